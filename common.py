@@ -0,0 +1,550 @@
+"""
+توابع و تنظیمات مشترک بین صفحات رابط کاربری
+نویسنده: hoseynd-ai
+"""
+
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from data_processor import DataProcessor, SearchMode, SearchResult
+import io
+import codecs
+import datetime
+from typing import List
+
+# ==================== ثابت‌ها ====================
+# در این ماژول (که یک بار import می‌شود) تعریف شده‌اند تا در هر اجرای مجدد صفحه‌ها دوباره ساخته نشوند
+CUSTOM_CSS = """
+<style>
+    .stTabs [data-baseweb="tab-list"] {
+        gap: 24px;
+    }
+    .stTabs [data-baseweb="tab"] {
+        padding: 10px 20px;
+    }
+</style>
+"""
+
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+STATE_CHOICES = ("رسمی", "غیررسمی")
+
+REPORT_TYPES = ("سالانه", "ماهانه", "محصولات", "وضعیت سفارشات", "همه داده‌ها")
+
+# ستون‌های تاریخچه خرید مشتری (نتایج جستجو) و سفارشات مشتری در ویرایش CRM
+HISTORY_COLUMNS = ['year', 'month', 'state_normalized', 'products_str', 'mobile', 'address']
+CUSTOMER_RECORD_COLUMNS = ['year', 'month', 'state_normalized', 'mobile', 'products_str']
+
+# ستون‌های نمایش داده شده در لیست کامل سفارشات CRM
+ORDER_LIST_COLUMNS = ['customer_name', 'year', 'month', 'state_normalized', 'mobile', 'products_str']
+
+# حالت‌های جستجو: برچسب نمایشی ← حالت
+SEARCH_MODES = {
+    "خودکار ⭐": SearchMode.AUTO,
+    "دقیق": SearchMode.EXACT,
+    "کلمات کلیدی": SearchMode.PARTIAL,
+    "فازی": SearchMode.FUZZY
+}
+
+# حداقل طول عبارت جستجو
+MIN_QUERY_LENGTH = 2
+
+# سطوح اولویت مشتریان از دست رفته (به ترتیب نمایش)
+PRIORITY_LEVELS = ('🔴 بالا', '🟡 متوسط', '🟢 پایین')
+
+# نمایش سال و ماه به صورت عدد ساده (بدون جداکننده هزارگان) در جدول‌های سفارشات
+ORDER_COLUMN_CONFIG = {
+    'year': st.column_config.NumberColumn(format="%d"),
+    'month': st.column_config.NumberColumn(format="%d")
+}
+
+# حداکثر ردیف‌های ارسالی به مرورگر در لیست کامل (بقیه از طریق دانلود یا گزینه نمایش همه)
+MAX_RENDER_ROWS = 5000
+
+# ==================== بارگذاری داده ====================
+@st.cache_resource(show_spinner="در حال بارگذاری داده...")
+def _load_data_processor() -> DataProcessor:
+    """ساخت DataProcessor و بارگذاری داده (یک بار برای کل پروسه، مشترک بین جلسه‌ها)"""
+    dp = DataProcessor()
+    dp.load_data()
+    dp.process_data()
+    return dp
+
+def get_data_processor() -> DataProcessor:
+    """DataProcessor مشترک (در اولین فراخوانی ساخته و داده بارگذاری می‌شود)"""
+    try:
+        return _load_data_processor()
+    except Exception as e:
+        st.error(f"خطا در بارگذاری: {e}")
+        st.stop()
+
+# ==================== توابع کمکی ====================
+def _arrow_column(series: pd.Series) -> pa.Array:
+    """تبدیل یک ستون به آرایه Arrow"""
+    try:
+        return pa.array(series, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # ستون object با انواع مختلف (مثلاً شماره ثابت عددی و متنی)
+        return pa.array(series.map(lambda v: None if pd.isna(v) else str(v)), type=pa.string())
+
+
+def _csv_column(series: pd.Series) -> pa.Array:
+    """تبدیل یک ستون به آرایه Arrow قابل نوشتن در CSV"""
+    arr = _arrow_column(series)
+    
+    if pa.types.is_list(arr.type):
+        # ستون‌های لیستی (مانند products_list) به صورت متن جدا شده با کاما
+        return pa.array(series.str.join(', '), from_pandas=True)
+    
+    if pa.types.is_dictionary(arr.type):
+        return arr.dictionary_decode()
+    
+    return arr
+
+
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """تبدیل DataFrame به CSV (UTF-8 با BOM) با نویسنده CSV در pyarrow"""
+    table = pa.table({str(col): _csv_column(df[col]) for col in df.columns})
+    
+    buf = io.BytesIO()
+    buf.write(codecs.BOM_UTF8)
+    pacsv.write_csv(table, buf, pacsv.WriteOptions(quoting_style='needed'))
+    return buf.getvalue()
+
+
+def to_parquet_bytes(df: pd.DataFrame) -> bytes:
+    """تبدیل DataFrame به Parquet (فشرده با zstd) در بافر بایتی"""
+    table = pa.table({str(col): _arrow_column(df[col]) for col in df.columns})
+    
+    buf = io.BytesIO()
+    pq.write_table(table, buf, compression='zstd')
+    return buf.getvalue()
+
+
+# فرمت‌های خروجی دانلود: پسوند فایل و نوع MIME
+EXPORT_FORMATS = {
+    'Parquet': ('parquet', 'application/octet-stream'),
+    'CSV': ('csv', 'text/csv'),
+    'Excel': ('xlsx', EXCEL_MIME)
+}
+
+
+def to_export_bytes(dp: DataProcessor, df: pd.DataFrame, export_format: str) -> bytes:
+    """ساخت فایل دانلود در فرمت انتخاب شده (یکی از کلیدهای EXPORT_FORMATS)"""
+    if export_format == 'Parquet':
+        return to_parquet_bytes(df)
+    if export_format == 'Excel':
+        return dp.export_to_excel_bytes(df)
+    return to_csv_bytes(df)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def now_str() -> str:
+    """زمان جاری با دقت دقیقه برای هدر (در هر دقیقه یک بار ساخته می‌شود)"""
+    return datetime.datetime.now().strftime('%Y/%m/%d %H:%M')
+
+
+def to_arrow(df: pd.DataFrame, columns: List[str]) -> pa.Table:
+    """تبدیل مستقیم ستون‌های لازم به جدول Arrow برای st.dataframe (بدون کپی میانی DataFrame)"""
+    return pa.Table.from_pandas(df, columns=columns, preserve_index=False)
+
+# ==================== کش محاسبات ====================
+@st.cache_data(show_spinner=False)
+def compute_kpis(_dp: DataProcessor, data_version: int) -> dict:
+    """شاخص‌های کلیدی داشبورد و تحلیل وضعیت (فقط با تغییر نسخه داده دوباره محاسبه می‌شود)"""
+    # شمارنده‌ها با هم در _refresh_summaries به‌روز می‌شوند؛ زیر قفل از یک نسخه داده خوانده شوند
+    with _dp.lock:
+        total_orders = _dp.total_orders
+        formal_count = _dp.formal_orders
+        informal_count = _dp.informal_orders
+        total_customers = len(_dp.sorted_customer_names)
+        total_products = _dp.total_products
+    
+    state_total = formal_count + informal_count
+    
+    return {
+        'total_customers': total_customers,
+        'total_orders': total_orders,
+        'total_products': total_products,
+        'formal_count': formal_count,
+        'informal_count': informal_count,
+        # سهم رسمی از کل سفارشات (داشبورد) و از سفارشات با وضعیت مشخص (تحلیل وضعیت)
+        'formal_percentage': (formal_count / total_orders * 100) if total_orders > 0 else 0,
+        'formalization_percentage': (formal_count / state_total * 100) if state_total > 0 else 0
+    }
+
+
+@st.cache_data(show_spinner=False)
+def product_stats_cached(_dp: DataProcessor, data_version: int) -> pd.DataFrame:
+    """آمار کامل محصولات (یک بار مرتب‌سازی برای تمام صفحات)"""
+    return _dp.get_product_stats()
+
+
+@st.cache_data(show_spinner=False)
+def yearly_stats_cached(_dp: DataProcessor, data_version: int) -> pd.DataFrame:
+    """آمار سالانه (مشترک بین داشبورد، تحلیل زمانی و تحلیل وضعیت)"""
+    return _dp.get_yearly_stats()
+
+
+@st.cache_data(show_spinner=False)
+def order_state_stats_cached(_dp: DataProcessor, data_version: int) -> pd.DataFrame:
+    """آمار وضعیت سفارشات"""
+    return _dp.get_order_state_stats()
+
+
+@st.cache_data(show_spinner=False)
+def monthly_stats_cached(_dp: DataProcessor, data_version: int, year: int) -> pd.DataFrame:
+    """آمار ماهانه یک سال"""
+    return _dp.get_monthly_stats(year)
+
+
+@st.cache_data(show_spinner=False)
+def yearly_monthly_grouped_cached(_dp: DataProcessor, data_version: int) -> dict:
+    """آمار تجمیعی سال و ماه"""
+    return _dp.get_yearly_monthly_grouped()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def find_lost_customers_cached(
+    _dp: DataProcessor,
+    data_version: int,
+    active_period_start: int,
+    active_period_end: int,
+    silent_period_start: int,
+    silent_period_end: int,
+    similarity_threshold: float,
+    min_purchase_count: int
+) -> pd.DataFrame:
+    """شناسایی مشتریان از دست رفته (کش شده بر اساس پارامترها و نسخه داده)"""
+    return _dp.find_lost_customers(
+        active_period_start=active_period_start,
+        active_period_end=active_period_end,
+        silent_period_start=silent_period_start,
+        silent_period_end=silent_period_end,
+        similarity_threshold=similarity_threshold,
+        min_purchase_count=min_purchase_count
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def search_customer_cached(
+    _dp: DataProcessor,
+    data_version: int,
+    query: str,
+    mode: SearchMode,
+    min_score: int
+) -> List[SearchResult]:
+    """جستجوی مشتری (تعامل با نتایج، جستجو را دوباره اجرا نمی‌کند)"""
+    return _dp.search_customer(query, mode=mode, min_score=min_score)
+
+
+@st.cache_data(show_spinner=False)
+def customer_history_csv_cached(_dp: DataProcessor, data_version: int, customer_name: str) -> bytes:
+    """CSV تاریخچه خرید یک مشتری برای دکمه دانلود (فقط یک بار برای هر مشتری و نسخه داده)"""
+    return to_csv_bytes(_dp.get_customer_details(customer_name))
+
+
+@st.cache_data(show_spinner=False)
+def product_stats_csv_cached(_dp: DataProcessor, data_version: int) -> bytes:
+    """CSV گزارش محصولات برای دکمه دانلود"""
+    return to_csv_bytes(product_stats_cached(_dp, data_version))
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def customer_names_lower_cached(_dp: DataProcessor, data_version: int) -> pd.Series:
+    """نام مشتریان با حروف کوچک (یک بار برای هر نسخه داده، برای فیلتر نام)"""
+    return _dp.processed_data['customer_name'].str.lower()
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def filter_orders_cached(
+    _dp: DataProcessor,
+    data_version: int,
+    years: tuple,
+    states: tuple,
+    customer: str
+) -> pd.DataFrame:
+    """
+    فیلتر لیست سفارشات CRM (کش شده بر اساس فیلترها و نسخه داده)
+    
+    نتیجه بدون کپی بین اجراها به اشتراک گذاشته می‌شود و نباید تغییر داده شود.
+    """
+    # بدون فیلتر، خود داده (بدون کپی) برگردانده می‌شود
+    if not (years or states or customer):
+        return _dp.processed_data
+    
+    # موقعیت‌ها و take زیر قفل داده: ویرایش هم‌زمان جلسه دیگر (مثلاً حذف) موقعیت‌ها را جابه‌جا می‌کند
+    with _dp.lock:
+        # سال و وضعیت از ایندکس‌های آماده؛ فیلتر نام فقط روی ردیف‌های باقی‌مانده
+        positions = _dp.get_order_positions(list(years), list(states))
+        
+        if customer:
+            # جستجوی زیررشته ساده روی نام‌های از پیش کوچک‌شده (بدون case=False در هر بار)؛
+            # نسخه فعلی داده، نه نسخه کلید کش، تا طول نام‌ها با موقعیت‌ها یکی باشد
+            names = customer_names_lower_cached(_dp, _dp.data_version).iloc[positions]
+            positions = positions[
+                names.str.contains(customer.lower(), na=False, regex=False).to_numpy()
+            ]
+        
+        return _dp.processed_data.take(positions)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def export_orders_cached(
+    _dp: DataProcessor,
+    data_version: int,
+    years: tuple,
+    states: tuple,
+    customer: str,
+    export_format: str
+) -> bytes:
+    """فایل دانلود لیست سفارشات فیلتر شده (فقط با تغییر فیلتر، فرمت یا نسخه داده دوباره ساخته می‌شود)"""
+    filtered_df = filter_orders_cached(_dp, data_version, years, states, customer)
+    return to_export_bytes(_dp, filtered_df, export_format)
+
+
+# ==================== کش نمودارها ====================
+# رنگ وضعیت‌ها در نمودارها (وضعیت‌های دیگر: رنگ پیش‌فرض plotly)
+STATE_COLORS = {'رسمی': '#28a745', 'غیررسمی': '#ffc107'}
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_yearly_orders_bar(_yearly_stats: pd.DataFrame, data_version: int) -> go.Figure:
+    """نمودار ستونی انباشته سفارشات سالانه (داشبورد)"""
+    fig = go.Figure()
+    
+    fig.add_trace(go.Bar(
+        name='سفارش رسمی',
+        x=_yearly_stats['سال'],
+        y=_yearly_stats['سفارش_رسمی'],
+        marker_color='#28a745'
+    ))
+    
+    fig.add_trace(go.Bar(
+        name='سفارش غیررسمی',
+        x=_yearly_stats['سال'],
+        y=_yearly_stats['سفارش_غیررسمی'],
+        marker_color='#ffc107'
+    ))
+    
+    fig.update_layout(
+        title='📊 سفارشات سالانه (رسمی/غیررسمی)',
+        barmode='stack',
+        xaxis_title='سال',
+        yaxis_title='تعداد سفارش'
+    )
+    
+    return fig
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_top_products_pie(_product_stats: pd.DataFrame, data_version: int) -> go.Figure:
+    """نمودار دایره‌ای 10 محصول پرفروش"""
+    top_products = _product_stats.iloc[:10]
+    fig = go.Figure(go.Pie(
+        labels=top_products['محصول'],
+        values=top_products['تعداد_فروش'],
+        hole=0.4
+    ))
+    fig.update_layout(title='🎯 10 محصول پرفروش')
+    
+    return fig
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_state_orders_bar(_state_stats: pd.DataFrame, data_version: int) -> go.Figure:
+    """تعداد سفارشات بر اساس وضعیت"""
+    fig = go.Figure()
+    
+    # یک trace برای هر وضعیت تا هر وضعیت رنگ و راهنمای خودش را داشته باشد
+    for state, count in zip(_state_stats['وضعیت'], _state_stats['تعداد_سفارش']):
+        fig.add_trace(go.Bar(
+            name=state,
+            x=[state],
+            y=[count],
+            marker_color=STATE_COLORS.get(state)
+        ))
+    
+    fig.update_layout(
+        title='تعداد سفارشات بر اساس وضعیت',
+        xaxis_title='وضعیت',
+        yaxis_title='تعداد_سفارش'
+    )
+    
+    return fig
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_top_products_bar(_product_stats: pd.DataFrame, data_version: int, top_n: int) -> go.Figure:
+    """نمودار ستونی محصولات پرفروش"""
+    top_products = _product_stats.iloc[:top_n]
+    fig = go.Figure(go.Bar(
+        x=top_products['محصول'],
+        y=top_products['تعداد_فروش'],
+        marker=dict(
+            color=top_products['تعداد_فروش'],
+            colorscale='Viridis',
+            showscale=True
+        )
+    ))
+    fig.update_layout(
+        title=f'{top_n} محصول پرفروش',
+        xaxis_title='محصول',
+        yaxis_title='تعداد_فروش',
+        xaxis_tickangle=-45
+    )
+    
+    return fig
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_customer_trend_line(_yearly_stats: pd.DataFrame, data_version: int) -> go.Figure:
+    """روند تعداد مشتریان"""
+    fig = go.Figure(go.Scatter(
+        x=_yearly_stats['سال'],
+        y=_yearly_stats['تعداد_مشتری'],
+        mode='lines+markers'
+    ))
+    fig.update_layout(
+        title='روند تعداد مشتریان',
+        xaxis_title='سال',
+        yaxis_title='تعداد_مشتری'
+    )
+    
+    return fig
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_yearly_state_grouped_bar(_yearly_stats: pd.DataFrame, data_version: int) -> go.Figure:
+    """سفارشات رسمی و غیررسمی (ستونی گروهی)"""
+    fig = go.Figure()
+    
+    fig.add_trace(go.Bar(
+        name='رسمی',
+        x=_yearly_stats['سال'],
+        y=_yearly_stats['سفارش_رسمی'],
+        marker_color='#28a745'
+    ))
+    
+    fig.add_trace(go.Bar(
+        name='غیررسمی',
+        x=_yearly_stats['سال'],
+        y=_yearly_stats['سفارش_غیررسمی'],
+        marker_color='#ffc107'
+    ))
+    
+    fig.update_layout(
+        title='سفارشات رسمی و غیررسمی',
+        barmode='group'
+    )
+    
+    return fig
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_monthly_trend(_monthly_stats: pd.DataFrame, data_version: int, year: int) -> go.Figure:
+    """روند ماهانه یک سال"""
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=_monthly_stats['ماه'],
+        y=_monthly_stats['تعداد_سفارش'],
+        mode='lines+markers',
+        name='کل سفارشات',
+        line=dict(color='#667eea', width=3)
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=_monthly_stats['ماه'],
+        y=_monthly_stats['سفارش_رسمی'],
+        mode='lines+markers',
+        name='سفارش رسمی',
+        line=dict(color='#28a745', width=2)
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=_monthly_stats['ماه'],
+        y=_monthly_stats['سفارش_غیررسمی'],
+        mode='lines+markers',
+        name='سفارش غیررسمی',
+        line=dict(color='#ffc107', width=2)
+    ))
+    
+    fig.update_layout(
+        title=f'📊 روند ماهانه سال {year}',
+        xaxis_title='ماه',
+        yaxis_title='تعداد سفارش',
+        xaxis=dict(tickmode='linear', tick0=1, dtick=1)
+    )
+    
+    return fig
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_state_pie(_state_stats: pd.DataFrame, data_version: int) -> go.Figure:
+    """توزیع سفارشات بر اساس وضعیت"""
+    fig = go.Figure(go.Pie(
+        labels=_state_stats['وضعیت'],
+        values=_state_stats['تعداد_سفارش'],
+        marker_colors=[STATE_COLORS.get(state) for state in _state_stats['وضعیت']],
+        hole=0.4
+    ))
+    fig.update_layout(title='توزیع سفارشات')
+    
+    return fig
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_state_compare_bar(_state_stats: pd.DataFrame, data_version: int) -> go.Figure:
+    """مقایسه آماری وضعیت‌ها"""
+    fig = go.Figure()
+    
+    for column in ('تعداد_مشتری', 'تعداد_سفارش', 'تعداد_محصول'):
+        fig.add_trace(go.Bar(
+            name=column,
+            x=_state_stats['وضعیت'],
+            y=_state_stats[column]
+        ))
+    
+    fig.update_layout(
+        title='مقایسه آماری',
+        xaxis_title='وضعیت',
+        barmode='group'
+    )
+    
+    return fig
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def build_formalization_trend(_yearly_stats: pd.DataFrame, data_version: int) -> go.Figure:
+    """روند سالانه سفارشات رسمی و غیررسمی"""
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=_yearly_stats['سال'],
+        y=_yearly_stats['سفارش_رسمی'],
+        mode='lines+markers',
+        name='رسمی',
+        fill='tonexty',
+        line=dict(color='#28a745', width=3)
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=_yearly_stats['سال'],
+        y=_yearly_stats['سفارش_غیررسمی'],
+        mode='lines+markers',
+        name='غیررسمی',
+        fill='tozeroy',
+        line=dict(color='#ffc107', width=3)
+    ))
+    
+    fig.update_layout(
+        title='روند سالانه سفارشات رسمی و غیررسمی',
+        xaxis_title='سال',
+        yaxis_title='تعداد سفارش'
+    )
+    
+    return fig
@@ -1,14 +1,43 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import re
-from typing import List, Dict, Any, Tuple
-from collections import defaultdict
+from typing import List, Dict, Any, Tuple, Callable, Hashable, Optional
+import itertools
+from functools import lru_cache
+from bisect import bisect_right
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+from rapidfuzz import fuzz, process
+
+# شمارنده سراسری نسخه داده؛ هر بارگذاری/پردازش نسخه تازه‌ای می‌گیرد
+_data_versions = itertools.count(1)
+
+# فیلدهای پیش‌فرض جستجوی متنی
+DEFAULT_SEARCH_FIELDS = ['نام_شرکت', 'شماره_تلفن', 'محصولات', 'فایل_اصلی', 'نام_پاک']
+
+# کلیدواژه‌های فارسی محصولات
+PRODUCT_KEYWORDS = [
+    'محصول', 'کالا', 'جنس', 'اقلام', 'مواد', 'تجهیزات',
+    'دستگاه', 'ماشین', 'قطعه', 'لوازم', 'ابزار', 'سیستم',
+    'نرم افزار', 'برنامه', 'اپلیکیشن', 'پلتفرم', 'خدمات'
+]
+
+# سطوح ثابت وضعیت سفارش
+STATUS_LEVELS = ['رسمی', 'غیررسمی', 'نامشخص']
 
 class DataProcessor:
     def __init__(self):
         self.df = None
         self.processed_data = None
+        self._company_choices = None  # نام‌های یکتای شرکت‌ها برای جستجوی فازی
+        self.data_version = 0
+        self._stats_cache: Dict[Hashable, Any] = {}  # نتایج تجمیعی نسخه فعلی داده
         self.excel_file_path = "excel_files_by_year_panta-new.xlsx"
+        self.cache_dir = Path("crm_data")  # محل کش Parquet
+        self._source_path = None  # فایل اکسلی که داده فعلی از آن آمده است
         
         # کلیدواژه‌هایی که باید حذف شوند
         self.keywords_to_remove = [
@@ -29,106 +58,227 @@ class DataProcessor:
             "توزیع نسخ",
             "گزارش زمان بندی ارسال"
         ]
+        
+        # حذف تکراری‌ها و ساخت یک الگوی واحد تا هر متن فقط یک بار پیمایش شود
+        self.keywords_to_remove = list(dict.fromkeys(self.keywords_to_remove))
+        self._kw_re = re.compile('|'.join(re.escape(k) for k in self.keywords_to_remove))
+        self._ws_re = re.compile(r'\s+')
+        
+        # جدول یکسان‌سازی ی/ک عربی و الگوهای نرمال‌سازی وضعیت (یک بار ساخته می‌شوند)
+        self._unify_tr = str.maketrans({'\u064A': 'ی', '\u0643': 'ک'})
+        self._nospace_re = re.compile(r"[\s\-\u200c\u200d_:،,\u00A0\u2000-\u200A\u202F\u205F\u3000]+")
+        self._gheyr_re = re.compile(r"(?:غیر|غير).*رسم")
+        self._gheyr_word_re = re.compile(r"غیر|غير")
+        self._rasmi_re = re.compile(r"رسم")
+        self._nonpersian_re = re.compile(r"[^آ-ی\s]")
+        self._buyer_re = re.compile(r'خریدار\s*:?\s*([^,;\n]+)')
+        
+        # الگوی واحد کلیدواژه‌های محصول؛ تطبیق درون یک کلمه است، پس کلیدواژه‌های دارای فاصله کنار می‌روند
+        self._word_re = re.compile(r'\S+')
+        self._product_kw_re = re.compile(
+            '|'.join(re.escape(k) for k in PRODUCT_KEYWORDS if not any(c.isspace() for c in k))
+        )
+        
+        # الگوی واحد شماره تلفن (از خاص‌ترین به عمومی‌ترین تا 09... بر 11 رقمی مقدم باشد)
+        self._phone_re = re.compile(
+            r'(?:\+989\d{9}'       # International format
+            r'|09\d{9}'             # Mobile numbers starting with 09
+            r'|0\d{2,3}-?\d{7,8}'   # Landline numbers
+            r'|\b\d{4}-?\d{7}\b'    # Numbers with dash
+            r'|\b\d{11}\b)'         # 11-digit numbers
+        )
     
     def unify_persian_chars(self, s: str) -> str:
         """یکسان‌سازی حروف عربی/فارسی"""
         if s is None:
             return ""
-        s = str(s)
-        s = s.replace("\u064A", "ی").replace("\u0643", "ک")
-        return s
+        return str(s).translate(self._unify_tr)
     
     def remove_keywords(self, text: str) -> str:
         """حذف کلیدواژه‌های مشخص شده از متن"""
         if pd.isna(text) or not isinstance(text, str):
             return ""
         
-        cleaned_text = text
-        for keyword in self.keywords_to_remove:
-            # حذف دقیق کلیدواژه
-            cleaned_text = cleaned_text.replace(keyword, "")
-        
-        # پاک‌سازی فضاهای اضافی
-        cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
-        return cleaned_text
+        # حذف دقیق کلیدواژه‌ها و پاک‌سازی فضاهای اضافی
+        return self._ws_re.sub(' ', self._kw_re.sub('', text)).strip()
+    
+    def remove_keywords_series(self, series: pd.Series) -> pd.Series:
+        """نسخه ستونی remove_keywords برای Series رشته‌ای"""
+        return (
+            series.str.replace(self._kw_re, '', regex=True)
+            .str.replace(self._ws_re, ' ', regex=True)
+            .str.strip()
+        )
     
     def normalize_status(self, s) -> str:
         """نرمال‌سازی وضعیت رسمی/غیررسمی با دقت بیشتر در تشخیص"""
         if pd.isna(s):
             return "نامشخص"
         
-        st_text = self.unify_persian_chars(str(s)).strip()
+        st_text = self.unify_persian_chars(s).strip()
         
         # حذف تمام فضاها، نیم‌فاصله‌ها و کاراکترهای اضافی
-        st_nospace = re.sub(r"[\s\-\u200c\u200d_:،,\u00A0\u2000-\u200A\u202F\u205F\u3000]+", "", st_text)
-        st_nospace = st_nospace.lower()
+        st_nospace = self._nospace_re.sub("", st_text).lower()
         
-        # بررسی دقیق‌تر برای "غیر رسمی" و "غیررسمی"
-        if re.search(r"غیر.*رسم", st_nospace) or re.search(r"غير.*رسم", st_nospace):
+        # بررسی دقیق‌تر برای "غیر رسمی" و "غیررسمی" با جستجوی زیررشته ساده
+        # (پس از یکسان‌سازی حروف، «غير» با ی عربی دیگر وجود ندارد)
+        gheyr_at = st_nospace.find("غیر")
+        if gheyr_at >= 0 and "رسم" in st_nospace[gheyr_at + 3:]:
             return "غیررسمی"
-        elif re.search(r"رسم", st_nospace) and not re.search(r"غیر|غير", st_nospace):
+        elif gheyr_at < 0 and "رسم" in st_nospace:
             return "رسمی"
-        elif st_nospace == "" or "نامشخص" in st_nospace:
-            return "نامشخص"
         
         return "نامشخص"
     
+    def normalize_status_series(self, series: pd.Series) -> pd.Categorical:
+        """نسخه ستونی normalize_status با خروجی دسته‌ای (سه سطح)"""
+        st_nospace = (
+            series.fillna('').astype(str)
+            .str.translate(self._unify_tr)
+            .str.strip()
+            .str.replace(self._nospace_re, '', regex=True)
+            .str.lower()
+        )
+        
+        is_informal = st_nospace.str.contains(self._gheyr_re)
+        is_formal = st_nospace.str.contains(self._rasmi_re) & ~st_nospace.str.contains(self._gheyr_word_re)
+        status = np.where(is_informal, 'غیررسمی', np.where(is_formal, 'رسمی', 'نامشخص'))
+        
+        return pd.Categorical(status, categories=STATUS_LEVELS)
+    
     def clean_text(self, text: str) -> str:
         """حذف اعداد و کاراکترهای غیرحروف فارسی"""
         if pd.isna(text):
             return ""
-        txt = self.unify_persian_chars(str(text))
-        return re.sub(r"[^آ-ی\s]", "", txt)
+        return self._nonpersian_re.sub("", self.unify_persian_chars(text))
+    
+    def clean_text_series(self, series: pd.Series) -> pd.Series:
+        """نسخه ستونی clean_text (مقادیر خالی به رشته خالی تبدیل می‌شوند)"""
+        return (
+            series.astype(str)
+            .str.translate(self._unify_tr)
+            .str.replace(self._nonpersian_re, '', regex=True)
+        )
+    
+    def _bump_data_version(self):
+        """نسخه داده را جلو می‌برد و نتایج تجمیعی ذخیره شده را دور می‌ریزد"""
+        self.data_version = next(_data_versions)
+        self._stats_cache = {}
+    
+    def _memoize(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """هر محاسبه تجمیعی فقط یک بار برای هر نسخه داده انجام می‌شود"""
+        if key not in self._stats_cache:
+            self._stats_cache[key] = compute()
+        return self._stats_cache[key]
+    
+    def _parquet_cache_path(self, file_path: str, kind: str) -> Path:
+        """مسیر کش Parquet متناظر با فایل اکسل (kind: raw یا processed)"""
+        return self.cache_dir / f"{Path(file_path).stem}_{kind}.parquet"
+    
+    def _read_parquet_cache(self, file_path: str, kind: str) -> Optional[pd.DataFrame]:
+        """خواندن کش اگر از فایل اکسل جدیدتر باشد"""
+        cache_path = self._parquet_cache_path(file_path, kind)
+        
+        try:
+            if cache_path.stat().st_mtime < Path(file_path).stat().st_mtime:
+                return None
+            df = pd.read_parquet(cache_path, engine='pyarrow', memory_map=True)
+        except Exception:
+            # نبودِ کش یا pyarrow: بارگذاری/پردازش عادی
+            return None
+        
+        # pyarrow مقادیر خالی متنی را None برمی‌گرداند؛ مانند خروجی read_excel به NaN برمی‌گردانیم
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+        return df
+    
+    def _write_parquet_cache(self, file_path: str, kind: str, df: pd.DataFrame):
+        """ذخیره داده به صورت Parquet (فشرده با zstd) برای اجراهای بعدی"""
+        out = df.copy()
+        
+        # ستون‌های object با انواع مختلف در Parquet قابل ذخیره نیستند؛ مقادیر غیرخالی به متن تبدیل می‌شوند
+        for col in out.columns[out.dtypes == object]:
+            out[col] = out[col].map(lambda v: v if pd.isna(v) else str(v))
+        
+        try:
+            self.cache_dir.mkdir(exist_ok=True)
+            out.to_parquet(
+                self._parquet_cache_path(file_path, kind),
+                engine='pyarrow',
+                compression='zstd',
+                index=False
+            )
+        except Exception:
+            # کش اختیاری است؛ خطای نوشتن نباید بارگذاری را متوقف کند
+            pass
+    
+    def _postprocess_sheet(self, sheet_name: str, sheet_df: pd.DataFrame) -> pd.DataFrame:
+        """افزودن ستون‌های شیت، نام فایل و محتوای متنی به داده‌های یک شیت"""
+        sheet_df['sheet_name'] = sheet_name
+        
+        # Try to identify filename column
+        filename_col = None
+        for col in sheet_df.columns:
+            if any(keyword in str(col).lower() for keyword in ['filename', 'file', 'نام', 'فایل']):
+                filename_col = col
+                break
+        
+        if filename_col is None and len(sheet_df.columns) > 0:
+            filename_col = sheet_df.columns[0]
+        
+        if filename_col:
+            sheet_df['filename'] = sheet_df[filename_col]
+        else:
+            sheet_df['filename'] = f"Row_{sheet_df.index}"
+        
+        # Create file_content column by combining all text columns
+        # (پیوند روی آرایه object؛ بدون فراخوانی تابع پایتونی برای هر ردیف DataFrame)
+        text_columns = sheet_df.select_dtypes(include='object').columns
+        block = sheet_df[text_columns].fillna('').astype(str).to_numpy()
+        sheet_df['file_content'] = [' '.join(val for val in row if val) for row in block]
+        
+        # اعمال حذف کلیدواژه‌ها به محتوای فایل
+        sheet_df['file_content'] = self.remove_keywords_series(sheet_df['file_content'])
+        
+        return sheet_df
     
     def load_data(self, file_path: str = None) -> pd.DataFrame:
         """Load Excel data from file"""
         try:
             if file_path is None:
                 file_path = self.excel_file_path
+            self._source_path = file_path
             
-            # Read all sheets from Excel file
-            excel_file = pd.ExcelFile(file_path)
-            all_sheets_data = []
+            cached = self._read_parquet_cache(file_path, "raw")
+            if cached is not None:
+                self.df = cached
+                self._company_choices = self.df["clean_name"].dropna().str.lower().unique().tolist()
+                self._bump_data_version()
+                st.success(f"✅ داده‌ها از کش Parquet بارگذاری شد: {len(self.df)} رکورد")
+                return self.df
+            
+            # Read all sheets from Excel file (کتاب کار یک بار باز و همه شیت‌ها در یک فراخوانی خوانده می‌شوند)
+            with pd.ExcelFile(file_path) as excel_file:
+                st.info(f"📊 در حال خواندن {len(excel_file.sheet_names)} شیت از فایل اکسل...")
+                sheets = excel_file.parse(sheet_name=None)
             
-            st.info(f"📊 در حال خواندن {len(excel_file.sheet_names)} شیت از فایل اکسل...")
+            # پردازش شیت‌ها به صورت موازی؛ پیام‌های Streamlit فقط در نخ اصلی نمایش داده می‌شوند
+            with ThreadPoolExecutor() as executor:
+                futures = {
+                    sheet_name: executor.submit(self._postprocess_sheet, sheet_name, sheet_df)
+                    for sheet_name, sheet_df in sheets.items()
+                }
             
-            for sheet_name in excel_file.sheet_names:
+            all_sheets_data = []
+            for sheet_name, future in futures.items():
                 try:
-                    sheet_df = pd.read_excel(file_path, sheet_name=sheet_name)
-                    sheet_df['sheet_name'] = sheet_name
-                    
-                    # Try to identify filename column
-                    filename_col = None
-                    for col in sheet_df.columns:
-                        if any(keyword in str(col).lower() for keyword in ['filename', 'file', 'نام', 'فایل']):
-                            filename_col = col
-                            break
-                    
-                    if filename_col is None and len(sheet_df.columns) > 0:
-                        filename_col = sheet_df.columns[0]
-                    
-                    if filename_col:
-                        sheet_df['filename'] = sheet_df[filename_col]
-                    else:
-                        sheet_df['filename'] = f"Row_{sheet_df.index}"
-                    
-                    # Create file_content column by combining all text columns
-                    text_columns = [col for col in sheet_df.columns if sheet_df[col].dtype == 'object']
-                    sheet_df['file_content'] = sheet_df[text_columns].apply(
-                        lambda row: ' '.join([str(val) for val in row if pd.notna(val)]), axis=1
-                    )
-                    
-                    # اعمال حذف کلیدواژه‌ها به محتوای فایل
-                    sheet_df['file_content'] = sheet_df['file_content'].apply(self.remove_keywords)
-                    
-                    all_sheets_data.append(sheet_df)
-                    
+                    all_sheets_data.append(future.result())
                 except Exception as e:
                     st.warning(f"خطا در خواندن شیت {sheet_name}: {str(e)}")
             
             if all_sheets_data:
                 self.df = pd.concat(all_sheets_data, ignore_index=True)
-                st.success(f"✅ فایل بارگذاری شد: {len(self.df)} رکورد از {len(excel_file.sheet_names)} شیت")
+                st.success(f"✅ فایل بارگذاری شد: {len(self.df)} رکورد از {len(sheets)} شیت")
             else:
                 st.error("هیچ شیت قابل خواندنی یافت نشد")
                 return None
@@ -142,15 +292,28 @@ class DataProcessor:
                 self.df["year"] = None
             
             # نرمال‌سازی داده‌ها
-            self.df["official_status"] = self.df["official_status"].apply(self.normalize_status)
-            self.df["clean_name"] = self.df["filename"].apply(self.clean_text)
+            self.df["official_status"] = self.normalize_status_series(self.df["official_status"])
+            self.df["clean_name"] = self.clean_text_series(self.df["filename"])
+            self._company_choices = self.df["clean_name"].dropna().str.lower().unique().tolist()
             self.df["month"] = self.df["month"].fillna("نامشخص")
+            
+            # ستون‌های کم‌تنوع دسته‌ای می‌شوند (official_status از قبل دسته‌ای است)؛
+            # ستون‌های ماه و شیت processed_data همین نوع را به ارث می‌برند
+            for col in ["sheet_name", "month"]:
+                self.df[col] = self.df[col].astype("category")
             self.df["year_num"] = pd.to_numeric(self.df["year"], errors="coerce").astype("Int64")
             
-            # استخراج شماره تلفن
-            self.df["extracted_phones"] = self.df["file_content"].apply(self.extract_phone_numbers)
-            self.df["phone_count"] = self.df["extracted_phones"].apply(len)
-            self.df["phone_numbers_str"] = self.df["extracted_phones"].apply(lambda x: ', '.join(x) if x else 'یافت نشد')
+            # استخراج شماره تلفن (یک پیمایش regex برای کل ستون)؛
+            # فهرست‌ها فقط موقت هستند و ستون‌ها به صورت رشته Arrow و عدد صحیح نگه داشته می‌شوند
+            self.df["file_content"] = self.df["file_content"].astype("string[pyarrow]")
+            extracted = self._find_phones(self.df["file_content"])
+            self.df["phone_count"] = extracted.str.len().astype("int32")
+            self.df["phone_numbers_str"] = extracted.map(
+                lambda x: ', '.join(x) if x else 'یافت نشد'
+            ).astype("string[pyarrow]")
+            
+            self._bump_data_version()
+            self._write_parquet_cache(file_path, "raw", self.df)
             
             # نمایش آمار شیت‌ها
             sheet_stats = self.df['sheet_name'].value_counts().sort_index()
@@ -162,42 +325,43 @@ class DataProcessor:
             st.error(f"خطا در بارگذاری داده‌ها: {str(e)}")
             return None
     
+    def _find_phones(self, content: pd.Series) -> pd.Series:
+        """فهرست شماره‌های یکتای هر ردیف برای یک ستون متنی"""
+        # هسته regex در Arrow (RE2) ردیف‌های بدون هفت رقم متوالی را کنار می‌گذارد (هر شماره دست‌کم
+        # هفت رقم پشت سر هم دارد و Nd مانند \d در re ارقام فارسی را هم شامل می‌شود)؛
+        # الگوی اصلی فقط روی ردیف‌های باقی‌مانده اجرا می‌شود
+        candidates = pc.match_substring_regex(
+            pa.array(content.astype("string[pyarrow]")), r"\p{Nd}{7}"
+        ).fill_null(False).to_numpy(zero_copy_only=False)
+        
+        return pd.Series(
+            [
+                list(set(self._phone_re.findall(text))) if candidate else []
+                for text, candidate in zip(content.astype(str).to_numpy(), candidates)
+            ],
+            index=content.index,
+            dtype=object
+        )
+    
     def extract_phone_numbers(self, text: str) -> List[str]:
         """Extract phone numbers from text using regex patterns"""
         if pd.isna(text) or not isinstance(text, str):
             return []
         
-        # Persian/Iranian phone number patterns
-        patterns = [
-            r'09\d{9}',  # Mobile numbers starting with 09
-            r'\+989\d{9}',  # International format
-            r'0\d{2,3}-?\d{7,8}',  # Landline numbers
-            r'\b\d{11}\b',  # 11-digit numbers
-            r'\b\d{4}-?\d{7}\b',  # Numbers with dash
-        ]
-        
-        phone_numbers = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            phone_numbers.extend(matches)
-        
         # Remove duplicates and return
-        return list(set(phone_numbers))
+        return list(set(self._phone_re.findall(text)))
     
     def extract_company_names(self, filename: str, content: str) -> List[str]:
         """Extract company names from filename and content"""
         companies = []
         
-        # Extract from filename
+        # Extract from filename (نام فایل در ردیف‌های زیادی تکرار می‌شود؛ نتیجه ذخیره شده است)
         if filename:
-            name_parts = str(filename).replace('.xlsm', '').replace('.xlsx', '')
-            parts = [part.strip() for part in name_parts.split('-') if len(part.strip()) > 2]
-            companies.extend(parts)
+            companies.extend(_company_names_from_filename(str(filename)))
         
         # Extract from content
         if isinstance(content, str):
-            buyer_pattern = r'خریدار\s*:?\s*([^,;\n]+)'
-            buyer_matches = re.findall(buyer_pattern, content)
+            buyer_matches = self._buyer_re.findall(content)
             companies.extend([match.strip() for match in buyer_matches if match.strip()])
         
         return list(set(companies))
@@ -207,89 +371,97 @@ class DataProcessor:
         if pd.isna(text) or not isinstance(text, str):
             return []
         
-        # Product keywords in Persian
-        product_keywords = [
-            'محصول', 'کالا', 'جنس', 'اقلام', 'مواد', 'تجهیزات',
-            'دستگاه', 'ماشین', 'قطعه', 'لوازم', 'ابزار', 'سیستم',
-            'نرم افزار', 'برنامه', 'اپلیکیشن', 'پلتفرم', 'خدمات'
-        ]
+        # یک پیمایش الگوی کلیدواژه‌ها روی کل متن؛ هر تطبیق به کلمه‌ای که در آن افتاده نگاشت می‌شود
+        hits = [m.start() for m in self._product_kw_re.finditer(text)]
+        if not hits:
+            return []
         
-        products = []
-        words = text.split()
+        word_matches = list(self._word_re.finditer(text))
+        word_starts = [m.start() for m in word_matches]
+        words = [m.group() for m in word_matches]
+        hit_words = {bisect_right(word_starts, hit) - 1 for hit in hits}
         
-        for i, word in enumerate(words):
-            if any(keyword in word for keyword in product_keywords):
-                context_start = max(0, i-2)
-                context_end = min(len(words), i+3)
-                context = ' '.join(words[context_start:context_end])
-                products.append(context.strip())
+        products = [' '.join(words[max(0, i - 2):i + 3]) for i in hit_words]
         
         return list(set(products))
     
-    def fuzzy_search_companies(self, query: str, threshold: int = 60) -> List[Tuple[str, int]]:
-        """جستجوی فازی شرکت‌ها"""
+    def fuzzy_search_companies(self, query: str, threshold: int = 60, limit: int = 15) -> List[Tuple[str, int]]:
+        """جستجوی فازی شرکت‌ها (امتیازدهی با هسته‌های C++ کتابخانه RapidFuzz)"""
         if not query or self.df is None:
             return []
         
         query_clean = self.clean_text(query).lower()
-        companies = self.df["clean_name"].dropna().unique().tolist()
-        
-        matches = []
-        for company in companies:
-            company_clean = company.lower()
-            
-            if query_clean in company_clean:
-                score = 100
-            elif any(word in company_clean for word in query_clean.split()):
-                score = 80
-            else:
-                common_chars = set(query_clean) & set(company_clean)
-                score = int((len(common_chars) / max(len(query_clean), len(company_clean))) * 100)
-            
-            if score >= threshold:
-                matches.append((company, score))
-        
-        matches.sort(key=lambda x: x[1], reverse=True)
-        return matches[:15]
+        if self._company_choices is None:
+            self._company_choices = self.df["clean_name"].dropna().str.lower().unique().tolist()
+        
+        matches = process.extract(
+            query_clean,
+            self._company_choices,
+            scorer=fuzz.WRatio,
+            limit=limit,
+            score_cutoff=threshold
+        )
+        
+        # خروجی مرتب (نزولی) است؛ فقط (نام، امتیاز) برگردانده می‌شود
+        return [(company, int(score)) for company, score, _ in matches]
+
+    def _extract_companies_and_products(
+        self, filenames: List[str], contents: List[str]
+    ) -> Tuple[List[List[str]], List[List[str]]]:
+        """نام شرکت‌ها و محصولات همه ردیف‌ها"""
+        # ترتیبی: fork در پروسه چندنخی Streamlit ممکن است قفل شود و در حالت spawn
+        # این ماژول (نام فایل دارای فاصله) در پردازه کارگر قابل import نیست
+        companies = [
+            self.extract_company_names(filename, content)
+            for filename, content in zip(filenames, contents)
+        ]
+        products = [self.extract_products(content) for content in contents]
+        return companies, products
     
     def process_data(self) -> pd.DataFrame:
         """Process the raw data and extract structured information"""
         if self.df is None:
             return None
         
-        processed_rows = []
-        
-        for _, row in self.df.iterrows():
-            # اعمال حذف کلیدواژه‌ها به محتوای فایل قبل از پردازش
-            cleaned_content = self.remove_keywords(str(row.get('file_content', '')))
-            
-            phones = self.extract_phone_numbers(cleaned_content)
-            companies = self.extract_company_names(
-                str(row.get('filename', '')), 
-                cleaned_content
-            )
-            products = self.extract_products(cleaned_content)
-            
-            processed_row = {
-                'شماره_سند': str(row.get('filename', '')).split('-')[0] if '-' in str(row.get('filename', '')) else '',
-                'نام_شرکت': ', '.join(companies) if companies else 'نامشخص',
-                'نام_پاک': row.get('clean_name', ''),
-                'سال': row.get('year', ''),
-                'سال_عددی': row.get('year_num', ''),
-                'ماه': row.get('month', ''),
-                'وضعیت': row.get('official_status', 'نامشخص'),
-                'شیت_منبع': row.get('sheet_name', ''),
-                'شماره_تلفن': ', '.join(phones) if phones else 'یافت نشد',
-                'تعداد_تلفن': len(phones),
-                'محصولات': ', '.join(products) if products else 'یافت نشد',
-                'تعداد_محصولات': len(products),
-                'فایل_اصلی': row.get('filename', ''),
-                'محتوای_کامل': cleaned_content  # محتوای پاک شده را ذخیره می‌کنیم
-            }
-            
-            processed_rows.append(processed_row)
+        cached = self._read_parquet_cache(self._source_path, "processed") if self._source_path else None
+        if cached is not None and len(cached) == len(self.df):
+            self.processed_data = cached
+            self._bump_data_version()
+            return self.processed_data
         
-        self.processed_data = pd.DataFrame(processed_rows)
+        df = self.df
+        filenames = df.get('filename', pd.Series('', index=df.index)).astype(str)
+        
+        # کلیدواژه‌ها در load_data از محتوای فایل حذف شده‌اند؛ اینجا دوباره پیمایش نمی‌شود
+        cleaned_content = df['file_content'].fillna('').astype(str)
+        
+        # استخراج ستونی (بدون ساخت Series برای هر ردیف)
+        phones = self._find_phones(cleaned_content)
+        companies, products = self._extract_companies_and_products(
+            filenames.tolist(), cleaned_content.tolist()
+        )
+        
+        processed = pd.DataFrame({
+            'شماره_سند': filenames.str.split('-', n=1).str[0].where(filenames.str.contains('-', regex=False), ''),
+            'نام_شرکت': [', '.join(c) if c else 'نامشخص' for c in companies],
+            'نام_پاک': df.get('clean_name', ''),
+            'سال': df.get('year', ''),
+            'سال_عددی': df.get('year_num', ''),
+            'ماه': df.get('month', ''),
+            'وضعیت': df.get('official_status', 'نامشخص'),
+            'شیت_منبع': df.get('sheet_name', ''),
+            'شماره_تلفن': phones.map(lambda x: ', '.join(x) if x else 'یافت نشد'),
+            'تعداد_تلفن': phones.str.len(),
+            'محصولات': [', '.join(p) if p else 'یافت نشد' for p in products],
+            'تعداد_محصولات': [len(p) for p in products],
+            'فایل_اصلی': df.get('filename', ''),
+            'محتوای_کامل': cleaned_content  # محتوای پاک شده را ذخیره می‌کنیم
+        }, index=df.index)
+        
+        self.processed_data = processed.reset_index(drop=True)
+        self._bump_data_version()
+        if self._source_path:
+            self._write_parquet_cache(self._source_path, "processed", self.processed_data)
         return self.processed_data
     
     def search_company_detailed(self, company_name: str) -> Dict[str, Any]:
@@ -297,6 +469,13 @@ class DataProcessor:
         if self.processed_data is None:
             return {}
         
+        return self._memoize(
+            ('company_detailed', company_name),
+            lambda: self._compute_search_company_detailed(company_name)
+        )
+    
+    def _compute_search_company_detailed(self, company_name: str) -> Dict[str, Any]:
+        """جستجوی تفصیلی یک شرکت (بدون ذخیره‌سازی)"""
         matches = self.fuzzy_search_companies(company_name)
         if not matches:
             return {"error": f"هیچ نتیجه‌ای برای '{company_name}' یافت نشد"}
@@ -313,21 +492,13 @@ class DataProcessor:
         
         total_files = len(results)
         years_active = sorted(results["سال_عددی"].dropna().unique().astype(int).tolist())
+        # ستون‌های وضعیت و شیت دسته‌ای هستند؛ سطوح بدون رکورد در شمارش نمی‌آیند
         status_counts = results["وضعیت"].value_counts()
+        status_counts = status_counts[status_counts > 0]
         sheet_distribution = results["شیت_منبع"].value_counts()
+        sheet_distribution = sheet_distribution[sheet_distribution > 0]
         
-        yearly_stats = defaultdict(lambda: {"total": 0, "رسمی": 0, "غیررسمی": 0, "نامشخص": 0, "months": set(), "phones": 0})
-        for _, row in results.iterrows():
-            yr = row["سال_عددی"]
-            if pd.isna(yr):
-                continue
-            yr = int(yr)
-            st_status = row["وضعیت"]
-            monthly = row["ماه"]
-            yearly_stats[yr]["total"] += 1
-            yearly_stats[yr][st_status] += 1
-            yearly_stats[yr]["months"].add(str(monthly))
-            yearly_stats[yr]["phones"] += row["تعداد_تلفن"]
+        yearly_stats = self._yearly_stats(results, with_months=True)
         
         trend_analysis = "ثابت"
         if len(years_active) > 1:
@@ -347,36 +518,52 @@ class DataProcessor:
             "years_active": years_active,
             "status_counts": status_counts.to_dict(),
             "sheet_distribution": sheet_distribution.to_dict(),
-            "yearly_stats": dict(yearly_stats),
+            "yearly_stats": yearly_stats,
             "trend_analysis": trend_analysis,
             "recent_files": results.sort_values(["سال_عددی", "ماه"], ascending=[False, False]).head(15),
             "all_files": results
         }
     
+    def _yearly_stats(self, data: pd.DataFrame, with_months: bool = False) -> Dict[int, Dict[str, Any]]:
+        """تعداد کل، تفکیک وضعیت و تعداد تلفن هر سال با یک groupby (ردیف‌های بدون سال کنار می‌روند)"""
+        data = data.dropna(subset=["سال_عددی"])
+        if data.empty:
+            return {}
+        
+        grouped = data.groupby(data["سال_عددی"].astype(int))
+        status_counts = (
+            grouped["وضعیت"].value_counts()
+            .unstack(fill_value=0)
+            .reindex(columns=STATUS_LEVELS, fill_value=0)
+        )
+        
+        columns = [grouped.size().rename("total"), status_counts]
+        if with_months:
+            columns.append(grouped["ماه"].agg(lambda months: set(months.astype(str))).rename("months"))
+        columns.append(grouped["تعداد_تلفن"].sum().rename("phones"))
+        
+        return pd.concat(columns, axis=1).to_dict(orient="index")
+    
     def get_all_years_report(self) -> Dict[str, Any]:
         """گزارش کلی همه سال‌ها"""
         if self.processed_data is None:
             return {}
         
-        yearly_stats = defaultdict(lambda: {"total": 0, "رسمی": 0, "غیررسمی": 0, "نامشخص": 0, "phones": 0})
-        
-        for _, row in self.processed_data.iterrows():
-            year = row["سال_عددی"]
-            if pd.isna(year):
-                continue
-            year = int(year)
-            status = row["وضعیت"]
-            yearly_stats[year]["total"] += 1
-            yearly_stats[year][status] += 1
-            yearly_stats[year]["phones"] += row["تعداد_تلفن"]
-        
-        return dict(yearly_stats)
+        return self._memoize('all_years_report', self._compute_all_years_report)
+    
+    def _compute_all_years_report(self) -> Dict[str, Any]:
+        """گزارش کلی همه سال‌ها (بدون ذخیره‌سازی)"""
+        return self._yearly_stats(self.processed_data)
     
     def get_sheet_analysis(self) -> Dict[str, Any]:
         """تحلیل داده‌ها بر اساس شیت منبع"""
         if self.processed_data is None:
             return {}
         
+        return self._memoize('sheet_analysis', self._compute_sheet_analysis)
+    
+    def _compute_sheet_analysis(self) -> Dict[str, Any]:
+        """تحلیل داده‌ها بر اساس شیت منبع (بدون ذخیره‌سازی)"""
         sheet_stats = {}
         for sheet_name in self.processed_data["شیت_منبع"].unique():
             sheet_data = self.processed_data[self.processed_data["شیت_منبع"] == sheet_name]
@@ -386,11 +573,18 @@ class DataProcessor:
                 "companies": len(sheet_data["نام_شرکت"].unique()),
                 "files_with_phones": len(sheet_data[sheet_data["تعداد_تلفن"] > 0]),
                 "phone_success_rate": len(sheet_data[sheet_data["تعداد_تلفن"] > 0]) / len(sheet_data) * 100,
-                "status_distribution": sheet_data["وضعیت"].value_counts().to_dict()
+                "status_distribution": {
+                    status: count for status, count in sheet_data["وضعیت"].value_counts().items() if count > 0
+                }
             }
         
         return sheet_stats
     
+    def _build_search_blob(self) -> pd.Series:
+        """ستون جستجوی ترکیبی از فیلدهای پیش‌فرض (با حروف بزرگ)"""
+        fields = [self.processed_data[field].astype(str) for field in DEFAULT_SEARCH_FIELDS]
+        return fields[0].str.cat(fields[1:], sep='\x1f').str.upper()
+    
     def search_data(self, query: str, search_fields: List[str] = None) -> pd.DataFrame:
         """Search data based on query and specified fields"""
         if self.processed_data is None:
@@ -399,8 +593,11 @@ class DataProcessor:
         if not query:
             return self.processed_data
         
-        if search_fields is None:
-            search_fields = ['نام_شرکت', 'شماره_تلفن', 'محصولات', 'فایل_اصلی', 'نام_پاک']
+        if search_fields is None or list(search_fields) == DEFAULT_SEARCH_FIELDS:
+            # یک پیمایش روی ستون ترکیبی به جای یک پیمایش برای هر فیلد
+            # (حروف بزرگ مانند case=False در pandas؛ جداکننده \x1f نمی‌گذارد عبارت از مرز دو فیلد رد شود)
+            search_blob = self._memoize('search_blob', self._build_search_blob)
+            return self.processed_data[search_blob.str.contains(query.upper(), regex=False)]
         
         # Create boolean mask for search
         mask = pd.Series([False] * len(self.processed_data))
@@ -419,29 +616,36 @@ class DataProcessor:
         if self.processed_data is None:
             return {}
         
-        all_phones = []
-        all_products = []
+        return self._memoize('statistics', self._compute_statistics)
+    
+    def _compute_statistics(self) -> Dict[str, Any]:
+        """Get basic statistics about the data (بدون ذخیره‌سازی)"""
+        data = self.processed_data
         
-        for _, row in self.processed_data.iterrows():
-            if row['شماره_تلفن'] != 'یافت نشد':
-                phones = [p.strip() for p in str(row['شماره_تلفن']).split(',')]
-                all_phones.extend(phones)
-            
-            if row['محصولات'] != 'یافت نشد':
-                products = [p.strip() for p in str(row['محصولات']).split(',')]
-                all_products.extend(products)
+        # همه تلفن‌ها/محصولات یکتا با split و explode (بدون پیمایش ردیف به ردیف)
+        unique_phones, unique_products = (
+            data.loc[data[col] != 'یافت نشد', col].astype(str).str.split(',').explode().str.strip().unique()
+            for col in ('شماره_تلفن', 'محصولات')
+        )
         
         stats = {
             'تعداد_کل_سندها': len(self.processed_data),
             'تعداد_شرکت_های_منحصر_به_فرد': len(self.processed_data['نام_شرکت'].unique()),
-            'تعداد_سندهای_با_تلفن': len(self.processed_data[self.processed_data['تعداد_تلفن'] > 0]),
-            'تعداد_کل_تلفن_ها': len(set(all_phones)),
-            'تعداد_کل_محصولات': len(set(all_products)),
+            'تعداد_سندهای_با_تلفن': int((self.processed_data['تعداد_تلفن'] > 0).sum()),
+            'تعداد_کل_تلفن_ها': len(unique_phones),
+            'تعداد_کل_محصولات': len(unique_products),
             'سال_های_موجود': sorted([int(x) for x in self.processed_data['سال_عددی'].dropna().unique() if not pd.isna(x)]),
             'ماه_های_موجود': sorted(self.processed_data['ماه'].unique().tolist()),
             'شیت_های_منبع': sorted(self.processed_data['شیت_منبع'].unique().tolist()),
-            'all_phones': list(set(all_phones)),
-            'all_products': list(set(all_products))
+            'all_phones': unique_phones.tolist(),
+            'all_products': unique_products.tolist()
         }
         
         return stats
+
+
+@lru_cache(maxsize=4096)
+def _company_names_from_filename(filename: str) -> Tuple[str, ...]:
+    """بخش‌های نام شرکت در نام فایل (بدون پسوند اکسل، جدا شده با -)"""
+    name_parts = filename.replace('.xlsm', '').replace('.xlsx', '')
+    return tuple(part.strip() for part in name_parts.split('-') if len(part.strip()) > 2)
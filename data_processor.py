@@ -5,14 +5,75 @@
 """
 
 import pandas as pd
+import numpy as np
 import re
-from typing import List, Tuple, Any, Dict, Optional
+from collections import Counter, defaultdict
+from typing import List, Tuple, Any, Dict, Optional, Callable
 from rapidfuzz import fuzz, process
 import datetime
 from dataclasses import dataclass, asdict
 from enum import Enum
 import json
+import itertools
+from functools import lru_cache, wraps
+import threading
+import io
+import pickle
 from pathlib import Path
+from openpyxl import Workbook
+import xlsxwriter
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# شمارنده سراسری نسخه داده (برای کلید کش در رابط کاربری)
+_data_versions = itertools.count(1)
+
+# نسخه قالب کش داده پردازش شده؛ با تغییر منطق پاکسازی یا ایندکس افزایش یابد تا کش قدیمی استفاده نشود
+_PROCESSED_CACHE_VERSION = 4
+
+# کلیدهای متادیتای Parquet: مهر فایل اکسل منبع، و ستون‌های مختلط (ستون ← ستون نوع مقادیر غیرمتنی)؛
+# و نوع‌های قابل بازگردانی از متن
+_SOURCE_STAMP_KEY = b'panta:source_stamp'
+_MIXED_COLUMNS_KEY = b'panta:mixed_columns'
+_MIXED_VALUE_TYPES = {'int': int, 'float': float}
+
+# تعداد ردیف هر تکه در نوشتن اکسل ردیف به ردیف (فقط همین تکه به object تبدیل می‌شود)
+_EXCEL_CHUNK_ROWS = 10_000
+
+# الگوهای نرمال‌سازی (یک بار کامپایل می‌شوند)
+_WS_RE = re.compile(r'\s+')
+_NON_ALNUM_FA_RE = re.compile(r'[^a-zA-Z0-9آ-ی]')
+_NON_DIGIT_RE = re.compile(r'[^\d]')
+_PRODUCT_SEP_RE = re.compile(r'[,،]')
+
+# الگوی فاصله برای موتور رشته‌ای pyarrow (RE2)؛ در RE2 کلاس \s فقط ASCII است
+_WS_RE2 = r'[\t-\r\x{1c}-\x{20}\x{85}\p{Z}]+'
+
+# کلمات تشخیص وضعیت سفارش؛ هر گروه یک الگوی جایگزینی (یک پیمایش رشته به جای یک جستجو برای هر کلمه)
+_FORMAL_STATE_KEYWORDS = ['رسمی', 'رسمي', 'formal', 'official', 'فاکتور', 'invoice']
+_INFORMAL_STATE_KEYWORDS = [
+    'غیررسمی', 'غیررسمي', 'غیرّسمی', 'غیرسمی', 'informal', 'unofficial', 'پیشفاکتور', 'پیش‌فاکتور', 'proforma'
+]
+
+
+def _state_keywords_re(keywords: List[str]) -> re.Pattern:
+    """الگوی یافتن هر یک از کلمات (پس از حذف فاصله و نیم‌فاصله، مانند متن وضعیت)"""
+    normalized = dict.fromkeys(k.replace(" ", "").replace("\u200c", "").lower() for k in keywords)
+    return re.compile('|'.join(map(re.escape, normalized)))
+
+
+_FORMAL_STATE_RE = _state_keywords_re(_FORMAL_STATE_KEYWORDS)
+_INFORMAL_STATE_RE = _state_keywords_re(_INFORMAL_STATE_KEYWORDS)
+
+# کلمات پرتکرار نام شرکت‌ها که در مقایسه نام مشتریان نادیده گرفته می‌شوند
+_STOPWORDS = frozenset({
+    'شرکت', 'موسسه', 'گروه', 'سازمان', 'مجموعه',
+    'مهندسی', 'پیمانکاری', 'ساختمانی', 'عمرانی',
+    'تجاری', 'صنعتی', 'خدماتی', 'فنی', 'تولیدی',
+    'بازرگانی', 'پروژه', 'سهامی', 'خاص', 'عام',
+    'محدود', 'و', 'در', 'به', 'از', 'با'
+})
 
 
 # ==================== Enums ====================
@@ -40,51 +101,235 @@ class SearchResult:
     addresses: List[str]
     products: List[str]
     total_products: int
+    # متن آماده نمایش سال‌ها و ماه‌های فعالیت (یک بار هنگام ساخت ایندکس)
+    years_str: str = ""
+    months_str: str = ""
     
     def to_dict(self):
         return asdict(self)
 
 
+def _write_as_text(worksheet, row: int, col: int, token, *args):
+    """نوشتن مقدار غیرساده (لیست و مانند آن) به صورت متن در xlsxwriter"""
+    return worksheet.write_string(row, col, str(token), *args)
+
+
+def _synchronized(method: Callable) -> Callable:
+    """اجرای متد زیر قفل نمونه (یک DataProcessor بین همه جلسه‌های Streamlit مشترک است)"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class DataProcessor:
     """کلاس اصلی پردازش داده"""
     
     def __init__(self, excel_file: str = "temp_excel_files_by_year_panta-new.xlsx"):
         self.excel_file = excel_file
         self.df = None
+        
+        # قفل بارگذاری/پردازش/ویرایش و خواندن‌های processed_data و ایندکس‌ها (آمار، جستجو، موقعیت ردیف‌ها)؛
+        # بازگشتی است چون متدهای ویرایش خودشان process_data و save_to_excel را صدا می‌زنند
+        self.lock = threading.RLock()
+        
+        # (مسیر فایل، DataFrame خوانده شده از آن، مهر فایل) برای تشخیص داده دست‌نخورده در کش داده پردازش شده
+        self._source = None
         self.processed_data = None
         
+        # نسخه داده؛ با هر پردازش مجدد تغییر می‌کند
+        self.data_version = 0
+        
+        # گزینه‌های مرتب ویجت‌ها (یک بار در هر پردازش و به صورت tuple تغییرناپذیر ساخته می‌شوند)
+        self.sorted_years = ()
+        self.sorted_years_asc = ()
+        self.sorted_customer_names = ()
+        
+        # شمارنده‌های کل (یک بار در هر پردازش محاسبه می‌شوند)
+        self.total_orders = 0
+        self.formal_orders = 0
+        self.informal_orders = 0
+        self.total_products = 0
+        
+        # ماسک‌های رسمی/غیررسمی برای استفاده مجدد در آمارها
+        self._is_formal = None
+        self._is_informal = None
+        
         # مسیرهای ذخیره‌سازی
         self.data_dir = Path("crm_data")
         self.data_dir.mkdir(exist_ok=True)
         
         # کش برای جستجوی سریع‌تر
         self.customer_index = {}
+        self._search_choices_cache = None
+        
+        # نام مشتری / سال / وضعیت ← موقعیت ردیف‌ها در processed_data
+        self._customer_indices = {}
+        self._year_indices = {}
+        self._state_indices = {}
     
     # ==================== بارگذاری ====================
     
+    @_synchronized
     def load_data(self, file_path: str = None) -> pd.DataFrame:
-        """بارگذاری فایل اکسل"""
+        """بارگذاری فایل اکسل (در صورت وجود، از کش Parquet)"""
         try:
             file_path = file_path or self.excel_file
+            # مهر فایل پیش از خواندن؛ تغییر فایل در حین خواندن فقط کش را نامعتبر می‌کند
+            stamp = self._file_stamp(file_path)
             
-            xls = pd.ExcelFile(file_path)
-            frames = []
+            cached = self._read_parquet_cache(file_path, stamp)
+            if cached is not None:
+                self.df = cached
+                self._source = (file_path, self.df, stamp)
+                return self.df
             
-            for sheet_name in xls.sheet_names:
-                df_sheet = pd.read_excel(file_path, sheet_name=sheet_name)
-                df_sheet['sheet_name'] = sheet_name
-                frames.append(df_sheet)
+            # همه شیت‌ها با یک بار باز کردن فایل؛ موتور calamine (Rust) در صورت نصب بودن
+            # چند برابر سریع‌تر از openpyxl است و در نبودش به openpyxl برمی‌گردیم
+            try:
+                sheets = pd.read_excel(file_path, sheet_name=None, engine='calamine')
+            except ImportError:
+                sheets = pd.read_excel(file_path, sheet_name=None, engine='openpyxl')
             
-            self.df = pd.concat(frames, ignore_index=True)
+            self.df = pd.concat(
+                (df_sheet.assign(sheet_name=sheet_name) for sheet_name, df_sheet in sheets.items()),
+                ignore_index=True
+            )
             self.df.columns = self.df.columns.str.strip()
+            self._source = (file_path, self.df, stamp)
+            
+            self._write_parquet_cache(file_path, self.df, stamp)
             
             return self.df
             
         except Exception as e:
             raise Exception(f"خطا در بارگذاری فایل: {e}")
     
+    # ==================== کش Parquet ====================
+    
+    def _parquet_cache_path(self, file_path: str) -> Path:
+        """مسیر فایل کش Parquet متناظر با فایل اکسل"""
+        return self.data_dir / f"{Path(file_path).stem}.parquet"
+    
+    def _read_parquet_cache(self, file_path: str, stamp: Tuple[int, int]) -> Optional[pd.DataFrame]:
+        """خواندن کش اگر از همین نسخه فایل اکسل ساخته شده باشد"""
+        cache_path = self._parquet_cache_path(file_path)
+        
+        try:
+            # ابتدا فقط متادیتا؛ کش نسخه دیگری از فایل خوانده نمی‌شود
+            meta = pq.read_schema(cache_path).metadata or {}
+            if json.loads(meta.get(_SOURCE_STAMP_KEY, b'null')) != list(stamp):
+                return None
+            table = pq.read_table(cache_path, memory_map=True)
+        except Exception:
+            # نبودِ کش یا فایل خراب: بارگذاری عادی از اکسل
+            return None
+        
+        mixed = json.loads(meta.get(_MIXED_COLUMNS_KEY, b'{}'))
+        df = table.to_pandas()
+        
+        # pyarrow مقادیر خالی متنی را None برمی‌گرداند؛ مانند خروجی read_excel به NaN برمی‌گردانیم
+        df = df.where(df.notna(), np.nan)
+        
+        # بازگرداندن نوع اصلی مقادیر غیرمتنی ستون‌های مختلط (مثلاً 56717847.0 عددی، نه متن)
+        for col, tag_col in mixed.items():
+            tags = df.pop(tag_col)
+            values = df[col].to_numpy(dtype=object, copy=True)
+            for i in np.flatnonzero(tags.notna().to_numpy()):
+                values[i] = _MIXED_VALUE_TYPES[tags.iat[i]](values[i])
+            df[col] = values
+        
+        return df
+    
+    def _write_parquet_cache(self, file_path: str, df: pd.DataFrame, stamp: Tuple[int, int]):
+        """ذخیره داده خام به صورت Parquet برای بارگذاری‌های بعدی"""
+        out = df.copy()
+        mixed = {}
+        
+        # ستون‌های object با انواع مختلف (مثلاً شماره ثابت عددی و متنی) در Parquet
+        # قابل ذخیره نیستند؛ مقادیر غیرمتنی به متن تبدیل و نوعشان در ستون کناری ثبت
+        # می‌شود تا هنگام خواندن همان مقدار اصلی برگردد (ذخیره اکسل باید عدد بنویسد، نه متن)
+        for i, col in enumerate(out.columns[out.dtypes == object]):
+            types = out[col].map(lambda v: None if pd.isna(v) or isinstance(v, str) else type(v).__name__)
+            if types.isna().all():
+                continue
+            if not types.dropna().isin(list(_MIXED_VALUE_TYPES)).all():
+                # نوعی که بازگرداندن دقیقش از متن ممکن نیست؛ کش ساخته نمی‌شود
+                return
+            tag_col = f"__type_{i}__"
+            out[col] = out[col].map(lambda v: v if pd.isna(v) else str(v))
+            out[tag_col] = types
+            mixed[col] = tag_col
+        
+        try:
+            table = pa.Table.from_pandas(out, preserve_index=False)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                _SOURCE_STAMP_KEY: json.dumps(list(stamp)).encode(),
+                _MIXED_COLUMNS_KEY: json.dumps(mixed, ensure_ascii=False).encode()
+            })
+            pq.write_table(
+                table,
+                self._parquet_cache_path(file_path),
+                compression='zstd',
+                row_group_size=50000
+            )
+        except Exception:
+            # کش اختیاری است؛ خطای نوشتن نباید بارگذاری را متوقف کند
+            pass
+    
+    @staticmethod
+    def _file_stamp(file_path: str) -> Tuple[int, int]:
+        """(st_mtime_ns, st_size) فایل؛ هر تغییری در فایل (حتی بازگرداندن نسخه قدیمی‌تر) آن را عوض می‌کند"""
+        stat = Path(file_path).stat()
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _unmodified_source(self) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """(مسیر، مهر) فایل منبع، اگر self.df همان داده خوانده شده از آن و ویرایش نشده باشد"""
+        if self._source is None or self._source[1] is not self.df:
+            return None
+        return self._source[0], self._source[2]
+    
+    def _processed_cache_path(self, file_path: str) -> Path:
+        """مسیر فایل کش داده پردازش شده و ایندکس جستجو"""
+        return self.data_dir / f"{Path(file_path).stem}_processed.pkl"
+    
+    def _read_processed_cache(self, file_path: str, stamp: Tuple[int, int]) -> bool:
+        """بارگذاری processed_data و customer_index از کش اگر از همین نسخه فایل اکسل ساخته شده باشد"""
+        try:
+            with open(self._processed_cache_path(file_path), 'rb') as f:
+                cached = pickle.load(f)
+        except Exception:
+            return False
+        
+        # برابری دقیق مهر فایل، نه «کش جدیدتر از فایل» (فایل کپی شده یا بازگردانده شده زمان قدیمی‌تر دارد)
+        if cached.get('version') != _PROCESSED_CACHE_VERSION or cached.get('source_stamp') != stamp:
+            return False
+        
+        self.processed_data = cached['processed_data']
+        self.customer_index = cached['customer_index']
+        return True
+    
+    def _write_processed_cache(self, file_path: str, stamp: Tuple[int, int]):
+        """ذخیره processed_data و customer_index (pickle انواع دسته‌ای و ستون‌های لیستی را دست‌نخورده نگه می‌دارد)"""
+        cached = {
+            'version': _PROCESSED_CACHE_VERSION,
+            'source_stamp': stamp,
+            'processed_data': self.processed_data,
+            'customer_index': self.customer_index
+        }
+        
+        try:
+            with open(self._processed_cache_path(file_path), 'wb') as f:
+                pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # کش اختیاری است؛ خطای نوشتن نباید پردازش را متوقف کند
+            pass
+    
     # ==================== پردازش ====================
     
+    @_synchronized
     def process_data(self, df: pd.DataFrame = None) -> pd.DataFrame:
         """پردازش و پاکسازی داده"""
         if df is not None:
@@ -93,22 +338,50 @@ class DataProcessor:
         if self.df is None:
             raise Exception("ابتدا فایل را بارگذاری کنید.")
         
-        out = self.df.copy()
+        # داده دست‌نخورده فایل: در صورت وجود کش معتبر، پاکسازی و ساخت ایندکس تکرار نمی‌شود
+        source = self._unmodified_source()
+        if source is not None and self._read_processed_cache(*source):
+            self._refresh_summaries()
+            return self.processed_data
+        
+        out = self._clean_rows(self.df)
+        
+        # ستون‌های تکراری به صورت دسته‌ای (کد عددی به جای رشته در گروه‌بندی و مقایسه‌ها)؛
+        # state_normalized در _clean_rows دسته‌ای شده و self.df (منبع ذخیره اکسل) دست نمی‌خورد
+        for col in ('customer_name', 'sheet_name'):
+            out[col] = out[col].astype('category')
+        
+        self.processed_data = out
+        self._build_customer_index()
+        self._refresh_summaries()
+        
+        if source is not None:
+            self._write_processed_cache(*source)
+        
+        return out
+    
+    def _clean_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """پاکسازی ردیف‌های خام (برای کل داده یا فقط ردیف‌های ویرایش شده)"""
+        out = df.copy()
         
         # پاکسازی نام مشتری
         out['customer_name'] = out['customer name'].astype(str).str.strip()
-        out['customer_name_normalized'] = out['customer_name'].apply(self._normalize_text)
+        out['customer_name_normalized'] = self._normalize_text_series(out['customer_name'])
         
         # پاکسازی سال و ماه
-        out['year'] = pd.to_numeric(out['year'], errors='coerce')
-        out['month'] = pd.to_numeric(out['month'], errors='coerce')
+        # اعداد صحیح کوچک nullable به جای float64 (حافظه و پهنای باند کمتر در گروه‌بندی و مقایسه‌ها)
+        out['year'] = self._to_small_int(out['year'], 'Int16')
+        out['month'] = self._to_small_int(out['month'], 'Int8')
         
         # پاکسازی وضعیت سفارش
         out['state_original'] = out['state'].astype(str).str.strip()
-        out['state_normalized'] = out['state_original'].apply(self._normalize_state)
+        # وضعیت‌ها مقادیر تکراری کمی دارند؛ هر مقدار یکتا فقط یک بار نرمال می‌شود
+        state_map = {state: self._normalize_state(state) for state in out['state_original'].unique()}
+        out['state_normalized'] = out['state_original'].map(state_map).astype('category')
         
         # پاکسازی آدرس
-        out['address'] = out['address'].astype(str).str.strip()
+        # مقدار خالی یک‌بار اینجا به رشته خالی تبدیل می‌شود تا 'nan' به لایه‌های بعدی نرسد
+        out['address'] = out['address'].fillna('').astype(str).str.strip().replace('nan', '')
         
         # پاکسازی تلفن‌ها
         out['mobile'] = out['شماره موبایل'].astype(str).apply(self._clean_phone)
@@ -119,29 +392,46 @@ class DataProcessor:
         out['products_list_normalized'] = out['products_list'].apply(
             lambda x: [self._normalize_product_name(p) for p in x]
         )
-        out['product_count'] = out['products_list'].apply(len)
+        out['product_count'] = out['products_list'].apply(len).astype('int16')
+        # نسخه متنی محصولات برای نمایش و فرم ویرایش (ستون متنی سریع‌تر از ستون لیستی سریال می‌شود)
+        out['products_str'] = out['products_list'].str.join(', ')
         
         # حذف ردیف‌های خالی
         out = out.dropna(subset=['customer_name'])
         out = out[out['customer_name'] != 'nan']
         out = out[out['customer_name'] != '']
         
-        self.processed_data = out
-        self._build_customer_index()
-        
         return out
     
+    def _refresh_summaries(self):
+        """ایندکس‌ها، فهرست‌ها و شمارنده‌های processed_data (همه برداری) و نسخه جدید داده"""
+        out = self.processed_data
+        self._is_formal = (out['state_normalized'] == 'رسمی').to_numpy()
+        self._is_informal = (out['state_normalized'] == 'غیررسمی').to_numpy()
+        self._customer_indices = out.groupby('customer_name', observed=True, sort=False).indices
+        self._year_indices = out.groupby('year', sort=False).indices
+        self._state_indices = out.groupby('state_normalized', observed=True, sort=False).indices
+        self.sorted_years = tuple(sorted(out['year'].dropna().unique().astype(int).tolist(), reverse=True))
+        self.sorted_years_asc = self.sorted_years[::-1]
+        self.sorted_customer_names = tuple(sorted(out['customer_name'].unique()))
+        self.total_orders = len(out)
+        self.formal_orders = int(self._is_formal.sum())
+        self.informal_orders = int(self._is_informal.sum())
+        self.total_products = int(out['product_count'].sum())
+        self.data_version = next(_data_versions)
+    
     # ==================== توابع کمکی ====================
     
     @staticmethod
+    @lru_cache(maxsize=8192)
     def _normalize_text(text: str) -> str:
-        """نرمال‌سازی متن فارسی"""
+        """نرمال‌سازی متن فارسی (نتیجه برای نام‌ها و عبارت‌های تکراری در حافظه می‌ماند)"""
         if not isinstance(text, str) or text == 'nan':
             return ""
         
         text = text.replace("ي", "ی").replace("ك", "ک")
         text = text.replace("\u200c", " ")
-        text = re.sub(r'\s+', ' ', text)
+        text = _WS_RE.sub(' ', text)
         
         return text.strip().lower()
     
@@ -156,19 +446,12 @@ class DataProcessor:
         s_no_space = s.replace(" ", "").replace("\u200c", "").replace("\t", "").replace("\n", "").replace("\r", "")
         s_lower = s_no_space.lower()
         
-        formal_keywords = ['رسمی', 'رسمي', 'formal', 'official', 'فاکتور', 'invoice']
-        informal_keywords = ['غیررسمی', 'غیررسمي', 'غیرّسمی', 'غیرسمی', 'informal', 'unofficial', 'پیشفاکتور', 'پیش‌فاکتور', 'proforma']
-        
-        formal_normalized = [k.replace(" ", "").replace("\u200c", "").lower() for k in formal_keywords]
-        informal_normalized = [k.replace(" ", "").replace("\u200c", "").lower() for k in informal_keywords]
-        
-        for keyword in informal_normalized:
-            if keyword in s_lower:
-                return "غیررسمی"
+        # کلمات غیررسمی اولویت دارند («غیررسمی» شامل «رسمی» هم هست)
+        if _INFORMAL_STATE_RE.search(s_lower):
+            return "غیررسمی"
         
-        for keyword in formal_normalized:
-            if keyword in s_lower:
-                return "رسمی"
+        if _FORMAL_STATE_RE.search(s_lower):
+            return "رسمی"
         
         return s if s else "نامشخص"
     
@@ -194,7 +477,7 @@ class DataProcessor:
         normalized = normalized.replace("ي", "ی").replace("ك", "ک")
         
         # حذف تمام کاراکترهای غیرحرف و غیرعدد (فقط حروف و اعداد باقی بماند)
-        normalized = re.sub(r'[^a-zA-Z0-9آ-ی]', '', normalized)
+        normalized = _NON_ALNUM_FA_RE.sub('', normalized)
         
         # حذف فاصله‌های اضافی
         normalized = normalized.strip()
@@ -207,7 +490,7 @@ class DataProcessor:
         if not isinstance(phone, str) or phone == 'nan':
             return ""
         
-        phone = re.sub(r'[^\d]', '', phone)
+        phone = _NON_DIGIT_RE.sub('', phone)
         
         if phone.startswith('98') and len(phone) >= 10:
             phone = '0' + phone[2:]
@@ -219,11 +502,36 @@ class DataProcessor:
         if not isinstance(products_str, str) or products_str == 'nan':
             return []
         
-        products = re.split(r'[,،]', products_str)
+        products = _PRODUCT_SEP_RE.split(products_str)
         products = [p.strip() for p in products if p.strip()]
         
         return products
     
+    @staticmethod
+    def _to_small_int(values: pd.Series, dtype: str) -> pd.Series:
+        """تبدیل به عدد صحیح nullable (مقادیر غیرعددی، اعشاری یا خارج از بازه نوع ← خالی)"""
+        numbers = pd.to_numeric(values, errors='coerce')
+        limits = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+        valid = (numbers % 1 == 0) & numbers.between(limits.min, limits.max)
+        return numbers.where(valid).astype(dtype)
+    
+    # نسخه برداری روی ستون متنی pyarrow (همان خروجی، بدون apply ردیف به ردیف)
+    
+    @staticmethod
+    def _normalize_text_series(texts: pd.Series) -> pd.Series:
+        """نرمال‌سازی برداری ستون متنی (معادل _normalize_text)"""
+        normalized = (
+            texts.astype('string[pyarrow]')
+            .str.replace("ي", "ی", regex=False)
+            .str.replace("ك", "ک", regex=False)
+            .str.replace("\u200c", " ", regex=False)
+            .str.replace(_WS_RE2, ' ', regex=True)
+            .str.strip()
+            .str.lower()
+            .astype(object)
+        )
+        return normalized.where(texts.notna() & (texts != 'nan'), '')
+    
     # ==================== ایندکس ====================
     
     def _build_customer_index(self):
@@ -231,48 +539,84 @@ class DataProcessor:
         if self.processed_data is None:
             return
         
-        self.customer_index = {}
+        # یک groupby به جای فیلتر کل جدول برای هر مشتری
+        self.customer_index = {
+            customer_name: self._customer_index_entry(customer_name, customer_data)
+            for customer_name, customer_data in self.processed_data.groupby(
+                'customer_name', sort=False, observed=True
+            )
+        }
+    
+    def _update_customer_index(self, customer_name: str):
+        """به‌روزرسانی ایندکس جستجو فقط برای یک مشتری (پس از ویرایش یا حذف)"""
+        positions = self._customer_indices.get(customer_name)
         
-        for customer_name in self.processed_data['customer_name'].unique():
-            customer_data = self.processed_data[
-                self.processed_data['customer_name'] == customer_name
-            ]
-            
-            years = sorted(customer_data['year'].dropna().unique().tolist())
-            months = sorted(customer_data['month'].dropna().unique().tolist())
-            
-            formal_count = len(customer_data[customer_data['state_normalized'] == 'رسمی'])
-            informal_count = len(customer_data[customer_data['state_normalized'] == 'غیررسمی'])
-            
-            mobiles = customer_data['mobile'].unique().tolist()
-            phones = customer_data['phone'].unique().tolist()
-            addresses = customer_data['address'].unique().tolist()
-            
-            all_products = []
-            for products_list in customer_data['products_list']:
-                all_products.extend(products_list)
-            all_products = list(set(all_products))
-            
-            normalized_name = self._normalize_text(customer_name)
-            keywords = normalized_name.split()
-            
-            self.customer_index[customer_name] = {
-                'normalized_name': normalized_name,
-                'keywords': keywords,
-                'total_purchases': len(customer_data),
-                'formal_purchases': formal_count,
-                'informal_purchases': informal_count,
-                'years_active': years,
-                'months_active': months,
-                'mobile_numbers': [m for m in mobiles if m],
-                'phone_numbers': [p for p in phones if p],
-                'addresses': [a for a in addresses if a and a != 'nan'],
-                'products': all_products,
-                'total_products': len(all_products)
-            }
+        if positions is None:
+            self.customer_index.pop(customer_name, None)
+        else:
+            self.customer_index[customer_name] = self._customer_index_entry(
+                customer_name, self.processed_data.iloc[positions]
+            )
+    
+    def _reorder_customer_index(self):
+        """
+        ترتیب ایندکس جستجو پس از ویرایش درجا، مانند _build_customer_index (اولین ردیف هر مشتری)
+        
+        ترتیب ایندکس ترتیب نتایج هم‌امتیاز جستجو را تعیین می‌کند؛ نام جدید نباید به انتها برود.
+        """
+        order = self.processed_data['customer_name'].unique().tolist()
+        if order != list(self.customer_index):
+            self.customer_index = {name: self.customer_index[name] for name in order}
+    
+    def _customer_index_entry(self, customer_name: str, customer_data: pd.DataFrame) -> Dict:
+        """اطلاعات ایندکس جستجوی یک مشتری"""
+        years = sorted(customer_data['year'].dropna().unique().tolist())
+        months = sorted(customer_data['month'].dropna().unique().tolist())
+        
+        state_counts = customer_data['state_normalized'].value_counts()
+        formal_count = int(state_counts.get('رسمی', 0))
+        informal_count = int(state_counts.get('غیررسمی', 0))
+        
+        mobiles = customer_data['mobile'].unique().tolist()
+        phones = customer_data['phone'].unique().tolist()
+        addresses = customer_data['address'].unique().tolist()
+        
+        all_products = list({p for products_list in customer_data['products_list'] for p in products_list})
+        
+        normalized_name = self._normalize_text(customer_name)
+        keywords = normalized_name.split()
+        
+        return {
+            'normalized_name': normalized_name,
+            'keywords': keywords,
+            'keywords_set': frozenset(keywords),
+            'total_purchases': len(customer_data),
+            'formal_purchases': formal_count,
+            'informal_purchases': informal_count,
+            'years_active': years,
+            'months_active': months,
+            'years_str': ", ".join(map(str, years)),
+            'months_str': ", ".join(map(str, months)),
+            'mobile_numbers': [m for m in mobiles if m],
+            'phone_numbers': [p for p in phones if p],
+            'addresses': [a for a in addresses if a],
+            'products': all_products,
+            'total_products': len(all_products)
+        }
     
     # ==================== جستجو ====================
     
+    def _search_choices(self) -> Tuple[List[str], List[str]]:
+        """نام‌های نرمال (به ترتیب ایندکس) و واژگان کلمات ایندکس؛ یک بار برای هر نسخه داده"""
+        if self._search_choices_cache is None or self._search_choices_cache[0] != self.data_version:
+            infos = self.customer_index.values()
+            normalized_names = [info['normalized_name'] for info in infos]
+            vocab = list(dict.fromkeys(keyword for info in infos for keyword in info['keywords']))
+            self._search_choices_cache = (self.data_version, normalized_names, vocab)
+        
+        return self._search_choices_cache[1:]
+    
+    @_synchronized
     def search_customer(
         self,
         query: str,
@@ -286,28 +630,45 @@ class DataProcessor:
         query_normalized = self._normalize_text(query)
         query_keywords = query_normalized.split()
         
-        results = []
+        normalized_names, vocab = self._search_choices()
         
-        for customer_name, info in self.customer_index.items():
-            score = 0
-            
-            if mode == SearchMode.EXACT:
-                if info['normalized_name'] == query_normalized:
-                    score = 100
-            
-            elif mode == SearchMode.PARTIAL:
+        if mode == SearchMode.EXACT:
+            scores = [100 if name == query_normalized else 0 for name in normalized_names]
+        
+        elif mode == SearchMode.PARTIAL:
+            scores = []
+            for info in self.customer_index.values():
                 matches = 0
                 for q_word in query_keywords:
-                    if any(q_word in keyword for keyword in info['keywords']):
+                    # کلمه برابر (جستجوی هش) پیش از جستجوی زیررشته در تک‌تک کلمات
+                    if q_word in info['keywords_set'] or any(q_word in keyword for keyword in info['keywords']):
                         matches += 1
                 
-                if matches > 0:
-                    score = (matches / len(query_keywords)) * 100
-            
-            elif mode == SearchMode.FUZZY:
-                score = fuzz.token_set_ratio(query_normalized, info['normalized_name'])
+                scores.append((matches / len(query_keywords)) * 100 if matches > 0 else 0)
+        
+        elif mode == SearchMode.FUZZY:
+            # امتیاز همه نام‌ها در یک فراخوانی RapidFuzz (حلقه در C)
+            scores = process.cdist(
+                [query_normalized], normalized_names,
+                scorer=fuzz.token_set_ratio, dtype=np.float64, workers=-1
+            )[0].tolist()
+        
+        else:  # AUTO
+            # کلمات شبیه هر کلمه جستجو یک بار روی واژگان کل ایندکس پیدا می‌شوند
+            word_scores = process.cdist(
+                query_keywords, vocab, scorer=fuzz.ratio, dtype=np.float64, workers=-1
+            )
+            close_words = {
+                q_word: {vocab[j] for j in np.flatnonzero(row > 85)}
+                for q_word, row in zip(query_keywords, word_scores)
+            }
+            fallback_scores = process.cdist(
+                [query_normalized], normalized_names,
+                scorer=fuzz.token_set_ratio, dtype=np.float64, workers=-1
+            )[0].tolist()
             
-            else:  # AUTO
+            scores = []
+            for info, fallback_score in zip(self.customer_index.values(), fallback_scores):
                 if info['normalized_name'] == query_normalized:
                     score = 100
                 elif query_normalized in info['normalized_name']:
@@ -315,34 +676,42 @@ class DataProcessor:
                 else:
                     matches = 0
                     for q_word in query_keywords:
+                        close = close_words[q_word]
                         for keyword in info['keywords']:
                             if q_word in keyword:
                                 matches += 1
                                 break
-                            elif fuzz.ratio(q_word, keyword) > 85:
+                            elif keyword in close:
                                 matches += 0.8
                                 break
                     
                     if matches > 0:
                         score = (matches / len(query_keywords)) * 90
                     else:
-                        score = fuzz.token_set_ratio(query_normalized, info['normalized_name']) * 0.8
-            
-            if score >= min_score:
-                results.append(SearchResult(
-                    customer_name=customer_name,
-                    match_score=round(score, 2),
-                    total_purchases=info['total_purchases'],
-                    formal_purchases=info['formal_purchases'],
-                    informal_purchases=info['informal_purchases'],
-                    years_active=info['years_active'],
-                    months_active=info['months_active'],
-                    mobile_numbers=info['mobile_numbers'],
-                    phone_numbers=info['phone_numbers'],
-                    addresses=info['addresses'],
-                    products=info['products'],
-                    total_products=info['total_products']
-                ))
+                        score = fallback_score * 0.8
+                
+                scores.append(score)
+        
+        results = [
+            SearchResult(
+                customer_name=customer_name,
+                match_score=round(score, 2),
+                total_purchases=info['total_purchases'],
+                formal_purchases=info['formal_purchases'],
+                informal_purchases=info['informal_purchases'],
+                years_active=info['years_active'],
+                months_active=info['months_active'],
+                mobile_numbers=info['mobile_numbers'],
+                phone_numbers=info['phone_numbers'],
+                addresses=info['addresses'],
+                products=info['products'],
+                total_products=info['total_products'],
+                years_str=info['years_str'],
+                months_str=info['months_str']
+            )
+            for (customer_name, info), score in zip(self.customer_index.items(), scores)
+            if score >= min_score
+        ]
         
         results.sort(key=lambda x: x.match_score, reverse=True)
         
@@ -350,121 +719,115 @@ class DataProcessor:
     
     # ==================== تحلیل ====================
     
+    @_synchronized
     def get_yearly_stats(self) -> pd.DataFrame:
         """آمار سالانه"""
         if self.processed_data is None:
             return pd.DataFrame()
         
-        stats = self.processed_data.groupby('year').agg({
-            'customer_name': 'nunique',
-            'mobile': 'count',
-            'product_count': 'sum'
-        }).reset_index()
-        
-        stats.columns = ['سال', 'تعداد_مشتری', 'تعداد_سفارش', 'تعداد_محصول']
+        # همه ستون‌ها در یک گروه‌بندی بر اساس سال (بدون ادغام جدول‌های میانی)
+        data = self.processed_data
+        grouped = data.groupby('year', observed=True)
         
-        formal = self.processed_data[
-            self.processed_data['state_normalized'] == 'رسمی'
-        ].groupby('year').size().reset_index(name='سفارش_رسمی')
+        stats = pd.DataFrame({
+            'تعداد_مشتری': grouped['customer_name'].nunique(),
+            'تعداد_سفارش': grouped['mobile'].count(),
+            'تعداد_محصول': grouped['product_count'].sum(),
+            'سفارش_رسمی': pd.Series(self._is_formal, index=data.index).groupby(data['year']).sum(),
+            'سفارش_غیررسمی': pd.Series(self._is_informal, index=data.index).groupby(data['year']).sum()
+        }).rename_axis('سال').reset_index()
         
-        informal = self.processed_data[
-            self.processed_data['state_normalized'] == 'غیررسمی'
-        ].groupby('year').size().reset_index(name='سفارش_غیررسمی')
-        
-        stats = stats.merge(formal, left_on='سال', right_on='year', how='left')
-        stats = stats.merge(informal, left_on='سال', right_on='year', how='left')
-        stats = stats.drop(columns=['year_x', 'year_y'], errors='ignore')
-        
-        stats['سفارش_رسمی'] = stats['سفارش_رسمی'].fillna(0).astype(int)
-        stats['سفارش_غیررسمی'] = stats['سفارش_غیررسمی'].fillna(0).astype(int)
+        # کلید گروه هیچ‌گاه خالی نیست؛ نوع nullable به نوع numpy برمی‌گردد (برای نمودارها و جدول‌ها)
+        stats = stats.astype({'سال': 'int16'})
         
         return stats.sort_values('سال')
     
+    @_synchronized
     def get_monthly_stats(self, year: int = None) -> pd.DataFrame:
         """آمار ماهانه"""
         if self.processed_data is None:
             return pd.DataFrame()
         
-        df = self.processed_data.copy()
+        df = self.processed_data
         
         if year:
             df = df[df['year'] == year]
         
-        stats = df.groupby(['year', 'month']).agg({
+        stats = df.groupby(['year', 'month'], observed=True).agg({
             'customer_name': 'nunique',
             'mobile': 'count'
-        }).reset_index()
+        })
         
-        stats.columns = ['سال', 'ماه', 'تعداد_مشتری', 'تعداد_سفارش']
+        # تعداد سفارش هر وضعیت در هر ماه با یک گروه‌بندی و unstack (بدون جستجوی ردیف به ردیف)
+        state_counts = (
+            df.groupby(['year', 'month', 'state_normalized'], observed=True).size()
+            .unstack('state_normalized', fill_value=0)
+        )
+        state_counts.columns = state_counts.columns.astype(object)
+        state_counts = state_counts.reindex(columns=['رسمی', 'غیررسمی'], fill_value=0)
         
-        formal = df[df['state_normalized'] == 'رسمی'].groupby(['year', 'month']).size()
-        informal = df[df['state_normalized'] == 'غیررسمی'].groupby(['year', 'month']).size()
+        stats = stats.join(state_counts).reset_index()
+        stats.columns = ['سال', 'ماه', 'تعداد_مشتری', 'تعداد_سفارش', 'سفارش_رسمی', 'سفارش_غیررسمی']
         
-        stats['سفارش_رسمی'] = stats.apply(
-            lambda row: formal.get((row['سال'], row['ماه']), 0), axis=1
-        )
-        stats['سفارش_غیررسمی'] = stats.apply(
-            lambda row: informal.get((row['سال'], row['ماه']), 0), axis=1
-        )
+        # کلیدهای گروه هیچ‌گاه خالی نیستند؛ نوع nullable به نوع numpy برمی‌گردد
+        stats = stats.astype({'سال': 'int16', 'ماه': 'int8'})
         
         return stats.sort_values(['سال', 'ماه'])
     
+    @_synchronized
     def get_yearly_monthly_grouped(self) -> Dict[int, pd.DataFrame]:
         """دسته‌بندی ماه‌ها بر اساس سال"""
         if self.processed_data is None:
             return {}
         
-        years = sorted(self.processed_data['year'].dropna().unique())
         result = {}
         
-        for year in years:
-            year_int = int(year)
+        for year_int in self.sorted_years_asc:
             monthly_data = self.get_monthly_stats(year_int)
             result[year_int] = monthly_data
         
         return result
     
-    def get_product_stats(self) -> pd.DataFrame:
-        """آمار محصولات (با نرمال‌سازی)"""
+    @_synchronized
+    def get_product_stats(self, top_n: int = None) -> pd.DataFrame:
+        """آمار محصولات (با نرمال‌سازی)؛ با top_n فقط پرفروش‌ترین‌ها برگردانده می‌شوند"""
         if self.processed_data is None:
             return pd.DataFrame()
         
-        # دیکشنری برای نگهداری محصولات نرمال شده و نام اصلی‌شان
-        product_mapping = {}
-        
-        for idx, row in self.processed_data.iterrows():
-            original_products = row['products_list']
-            normalized_products = row['products_list_normalized']
-            
-            for orig, norm in zip(original_products, normalized_products):
-                if norm and norm not in product_mapping:
-                    product_mapping[norm] = orig
+        # هر محصول یک ردیف (نام اصلی کنار نام نرمال شده)؛ نام‌های نرمال خالی کنار گذاشته می‌شوند
+        products = self.processed_data[['products_list', 'products_list_normalized']].explode(
+            ['products_list', 'products_list_normalized'], ignore_index=True
+        )
+        normalized = products['products_list_normalized']
+        products = products[normalized.notna() & (normalized != '')]
         
-        # شمارش محصولات نرمال شده
-        all_normalized_products = []
-        for products_list in self.processed_data['products_list_normalized']:
-            all_normalized_products.extend(products_list)
+        if products.empty:
+            return pd.DataFrame(columns=['محصول', 'تعداد_فروش'])
         
-        all_normalized_products = [p for p in all_normalized_products if p]
+        # اولین نام اصلی دیده شده برای هر محصول نرمال شده
+        product_mapping = products.drop_duplicates('products_list_normalized').set_index(
+            'products_list_normalized'
+        )['products_list']
         
-        if not all_normalized_products:
-            return pd.DataFrame(columns=['محصول', 'تعداد_فروش'])
+        # value_counts خروجی را به ترتیب نزولی برمی‌گرداند؛ مرتب‌سازی دوباره لازم نیست
+        counts = products['products_list_normalized'].value_counts()
+        if top_n is not None:
+            counts = counts.iloc[:top_n]
         
-        product_counts = pd.Series(all_normalized_products).value_counts().reset_index()
+        product_counts = counts.reset_index()
         product_counts.columns = ['محصول_نرمال', 'تعداد_فروش']
         
         product_counts['محصول'] = product_counts['محصول_نرمال'].map(product_mapping)
         
-        product_counts = product_counts[['محصول', 'تعداد_فروش']].sort_values('تعداد_فروش', ascending=False)
-        
-        return product_counts
+        return product_counts[['محصول', 'تعداد_فروش']]
     
+    @_synchronized
     def get_order_state_stats(self) -> pd.DataFrame:
         """آمار وضعیت سفارشات"""
         if self.processed_data is None:
             return pd.DataFrame()
         
-        stats = self.processed_data.groupby('state_normalized').agg({
+        stats = self.processed_data.groupby('state_normalized', observed=True).agg({
             'customer_name': 'nunique',
             'mobile': 'count',
             'product_count': 'sum'
@@ -474,17 +837,45 @@ class DataProcessor:
         
         return stats
     
-    def get_customer_details(self, customer_name: str) -> pd.DataFrame:
-        """جزئیات کامل یک مشتری"""
+    @_synchronized
+    def get_customer_details(self, customer_name: str, columns: List[str] = None) -> pd.DataFrame:
+        """جزئیات کامل یک مشتری (در صورت تعیین columns فقط همان ستون‌ها کپی می‌شوند)"""
         if self.processed_data is None:
             return pd.DataFrame()
         
-        return self.processed_data[
-            self.processed_data['customer_name'] == customer_name
-        ].copy()
+        positions = self._customer_indices.get(customer_name)
+        if positions is None:
+            positions = []
+        
+        if columns is None:
+            return self.processed_data.iloc[positions]
+        
+        return self.processed_data.iloc[positions, self.processed_data.columns.get_indexer(columns)]
+    
+    @_synchronized
+    def get_order_positions(self, years: List[int] = None, states: List[str] = None) -> np.ndarray:
+        """
+        موقعیت (مرتب) ردیف‌های processed_data با سال و وضعیت داده شده
+        
+        به جای اسکن کل ستون‌ها، از ایندکس‌های ساخته شده در process_data استفاده می‌کند.
+        فیلتر خالی یعنی بدون محدودیت.
+        """
+        if self.processed_data is None:
+            return np.array([], dtype=np.intp)
+        
+        positions = np.arange(len(self.processed_data))
+        empty = np.array([], dtype=np.intp)
+        
+        for values, indices in ((years, self._year_indices), (states, self._state_indices)):
+            if values:
+                selected = np.concatenate([indices.get(v, empty) for v in set(values)])
+                positions = np.intersect1d(positions, selected, assume_unique=True)
+        
+        return positions
     
     # ==================== مشتریان از دست رفته ====================
     
+    @_synchronized
     def find_lost_customers(
         self,
         active_period_start: int = 1393,
@@ -509,40 +900,43 @@ class DataProcessor:
             (self.processed_data['year'] <= silent_period_end)
         ].copy()
         
-        # جمع‌آوری اطلاعات مشتریان دوره فعالیت
-        active_groups = []
-        
-        for customer_name, group in active_customers.groupby('customer_name'):
-            last_year = group['year'].max()
-            last_month_series = group['month'].dropna()
-            last_month = int(last_month_series.iloc[-1]) if len(last_month_series) > 0 else 0
-            
-            mobiles = ', '.join(set(filter(None, group['mobile'].unique())))
-            phones = ', '.join(set(filter(None, group['phone'].unique())))
-            address = group['address'].iloc[-1] if len(group) > 0 else ''
-            
-            all_products = []
-            for products_list in group['products_list']:
-                all_products.extend(products_list)
-            all_products = list(set(all_products))
-            
-            formal_count = len(group[group['state_normalized'] == 'رسمی'])
-            informal_count = len(group[group['state_normalized'] == 'غیررسمی'])
-            order_stats = f"رسمی: {formal_count}, غیررسمی: {informal_count}"
-            
-            active_groups.append({
-                'customer_name': customer_name,
-                'last_year': int(last_year) if pd.notna(last_year) else 0,
-                'last_month': last_month,
-                'total_purchases': len(group),
-                'mobiles': mobiles,
-                'phones': phones,
-                'address': address,
-                'products': all_products,
-                'order_stats': order_stats
-            })
+        # جمع‌آوری اطلاعات مشتریان دوره فعالیت (همه ستون‌ها با تجمیع گروهی، بدون زیرجدول برای هر مشتری)
+        grouped = active_customers.groupby('customer_name', observed=True)
+        
+        state_counts = (
+            active_customers.groupby(['customer_name', 'state_normalized'], observed=True).size()
+            .unstack('state_normalized', fill_value=0)
+        )
+        state_counts.columns = state_counts.columns.astype(object)
+        state_counts = state_counts.reindex(columns=['رسمی', 'غیررسمی'], fill_value=0)
+        
+        # ردیف آخر هر مشتری (و آخرین ردیف با ماه ثبت شده) با drop_duplicates به جای انتخاب درون گروه
+        customers = grouped.size().index
+        last_rows = active_customers.drop_duplicates('customer_name', keep='last').set_index('customer_name')
+        last_months = (
+            active_customers.dropna(subset=['month'])
+            .drop_duplicates('customer_name', keep='last')
+            .set_index('customer_name')['month']
+        )
         
-        active_unique = pd.DataFrame(active_groups)
+        def join_nonempty(values: pd.Series) -> str:
+            return ', '.join(set(filter(None, values.unique())))
+        
+        active_unique = pd.DataFrame({
+            'last_year': grouped['year'].max().fillna(0).astype(int),
+            'last_month': last_months.reindex(customers).fillna(0).astype(int),
+            'total_purchases': grouped.size(),
+            'mobiles': grouped['mobile'].agg(join_nonempty),
+            'phones': grouped['phone'].agg(join_nonempty),
+            'address': last_rows['address'].reindex(customers),
+            'products': grouped['products_list'].agg(
+                lambda lists: list(set(itertools.chain.from_iterable(lists)))
+            ),
+            'order_stats': (
+                'رسمی: ' + state_counts['رسمی'].astype(str)
+                + ', غیررسمی: ' + state_counts['غیررسمی'].astype(str)
+            )
+        }).rename_axis('customer_name').reset_index().astype({'customer_name': object})
         
         if len(active_unique) == 0:
             return pd.DataFrame(columns=[
@@ -554,38 +948,68 @@ class DataProcessor:
         
         recent_names = recent_customers['customer_name'].unique()
         
-        lost_customers = []
+        # کدگذاری عددی کلمات کلیدی (هر نام فقط یک بار توکنایز می‌شود)
+        vocabulary = {}
+        recent_codes = [
+            self._encode_keywords(self._extract_keywords(name), vocabulary)
+            for name in recent_names
+        ]
+        active_codes = [
+            self._encode_keywords(self._extract_keywords(name), vocabulary)
+            for name in active_unique['customer_name']
+        ]
+        
+        similar = self._keyword_similarity(
+            list(vocabulary), active_codes, recent_codes, similarity_threshold
+        )
         
-        for _, row in active_unique.iterrows():
-            old_name = row['customer_name']
-            old_keywords = self._extract_keywords(old_name)
-            
-            is_found = False
+        def similarity(code1: int, code2: int) -> float:
+            return similar.get(code1, {}).get(code2, 0.0)
+        
+        # ایندکس معکوس: کد کلمه ← شماره نام‌های دوره سکوت
+        recent_by_code = defaultdict(set)
+        for i, codes in enumerate(recent_codes):
+            for code in codes:
+                recent_by_code[code].add(i)
+        
+        is_lost = []
+        
+        for old_codes in active_codes:
+            # فقط نام‌هایی که حداقل یک کلمه برابر یا شبیه دارند امتیاز غیرصفر می‌گیرند
+            if min_keyword_match > 0:
+                # هر کلمه نام قدیمی حداکثر ۱ امتیاز می‌دهد؛ نامی که کمتر از min_keyword_match کلمه
+                # برابر/شبیه دارد به حد نصاب نمی‌رسد و اصلاً امتیازدهی نمی‌شود
+                hits = Counter()
+                for code in old_codes:
+                    matched = set(recent_by_code.get(code, ()))
+                    for similar_code in similar.get(code, {}):
+                        matched |= recent_by_code[similar_code]
+                    hits.update(matched)
+                candidates = [i for i, count in hits.items() if count >= min_keyword_match]
+            else:
+                candidates = range(len(recent_codes))
             
-            for new_name in recent_names:
-                new_keywords = self._extract_keywords(new_name)
-                
-                match_score = self._calculate_keyword_match(
-                    old_keywords, 
-                    new_keywords, 
-                    similarity_threshold
-                )
-                
-                if match_score >= min_keyword_match:
-                    is_found = True
-                    break
+            is_found = any(
+                self._calculate_keyword_match(
+                    old_codes,
+                    recent_codes[i],
+                    similarity_threshold,
+                    similarity=similarity
+                ) >= min_keyword_match
+                for i in candidates
+            )
             
-            if not is_found:
-                lost_customers.append(row)
+            is_lost.append(not is_found)
         
-        if not lost_customers:
+        lost_customers = active_unique[is_lost]
+        
+        if lost_customers.empty:
             return pd.DataFrame(columns=[
                 'نام_مشتری', 'آخرین_سال', 'آخرین_ماه', 'تعداد_خرید',
                 'موبایل', 'تلفن', 'آدرس', 'محصولات', 'آمار_سفارشات', 'اولویت'
             ])
         
-        result_df = pd.DataFrame(lost_customers)
-        result_df = result_df[[
+        result_df = lost_customers[[
             'customer_name', 'last_year', 'last_month', 'total_purchases',
             'mobiles', 'phones', 'address', 'products', 'order_stats'
         ]]
@@ -603,31 +1027,78 @@ class DataProcessor:
             lambda x: ', '.join(x[:5]) + ('...' if len(x) > 5 else '') if isinstance(x, list) else str(x)
         )
         
+        # انواع داده کوچک‌تر برای نتیجه‌ای که به مرورگر و کش فرستاده می‌شود
+        result_df = result_df.astype({
+            'آخرین_سال': 'int16',
+            'آخرین_ماه': 'int8',
+            'تعداد_خرید': 'int32',
+            'اولویت': 'category'
+        })
+        
         return result_df
     
-    def _extract_keywords(self, name: str) -> List[str]:
-        """استخراج کلمات کلیدی از نام (با حذف کلمات پرتکرار)"""
-        stopwords = {
-            'شرکت', 'موسسه', 'گروه', 'سازمان', 'مجموعه',
-            'مهندسی', 'پیمانکاری', 'ساختمانی', 'عمرانی',
-            'تجاری', 'صنعتی', 'خدماتی', 'فنی', 'تولیدی',
-            'بازرگانی', 'پروژه', 'سهامی', 'خاص', 'عام',
-            'محدود', 'و', 'در', 'به', 'از', 'با'
-        }
-        
-        normalized = self._normalize_text(name)
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _extract_keywords(name: str) -> Tuple[str, ...]:
+        """استخراج کلمات کلیدی از نام (با حذف کلمات پرتکرار)؛ تاپل تغییرناپذیر تا نتیجه کش شده مشترک بماند"""
+        normalized = DataProcessor._normalize_text(name)
         words = normalized.split()
-        keywords = [word for word in words if word not in stopwords and len(word) > 2]
+        keywords = tuple(word for word in words if word not in _STOPWORDS and len(word) > 2)
         
         return keywords
     
+    @staticmethod
+    def _encode_keywords(keywords: Tuple[str, ...], vocabulary: Dict[str, int]) -> List[int]:
+        """تبدیل کلمات کلیدی به کد عددی (کلمات برابر کد یکسان می‌گیرند)"""
+        return [vocabulary.setdefault(word, len(vocabulary)) for word in keywords]
+    
+    @staticmethod
+    def _keyword_similarity(
+        words: List[str],
+        codes1: List[List[int]],
+        codes2: List[List[int]],
+        threshold: float = 85.0
+    ) -> Dict[int, Dict[int, float]]:
+        """
+        شباهت تمام جفت کلمات دو گروه با یک فراخوانی cdist
+        
+        خروجی فقط جفت‌هایی را نگه می‌دارد که شباهتشان حداقل threshold است:
+            {کد کلمه گروه اول: {کد کلمه گروه دوم: امتیاز}}
+        """
+        rows = sorted({code for codes in codes1 for code in codes})
+        cols = sorted({code for codes in codes2 for code in codes})
+        
+        if not rows or not cols:
+            return {}
+        
+        scores = process.cdist(
+            [words[code] for code in rows],
+            [words[code] for code in cols],
+            scorer=fuzz.ratio,
+            score_cutoff=threshold,
+            dtype=np.float64,
+            workers=-1
+        )
+        
+        similar = defaultdict(dict)
+        for i, j in zip(*np.nonzero(scores)):
+            similar[rows[i]][cols[j]] = float(scores[i, j])
+        
+        return dict(similar)
+    
     def _calculate_keyword_match(
         self, 
-        keywords1: List[str], 
-        keywords2: List[str],
-        threshold: float = 85.0
+        keywords1: List[Any], 
+        keywords2: List[Any],
+        threshold: float = 85.0,
+        similarity: Callable[[Any, Any], float] = fuzz.ratio
     ) -> float:
-        """محاسبه تعداد کلمات مشترک یا شبیه"""
+        """
+        محاسبه تعداد کلمات مشترک یا شبیه
+        
+        similarity به‌طور پیش‌فرض fuzz.ratio روی رشته‌هاست؛ برای کلمات کدگذاری شده
+        می‌توان جدول شباهت از پیش محاسبه شده را داد.
+        """
         match_count = 0.0
         used_keywords2 = set()
         
@@ -644,12 +1115,12 @@ class DataProcessor:
                     best_kw2 = kw2
                     break
                 
-                similarity = fuzz.ratio(kw1, kw2)
-                if similarity >= threshold and similarity > best_match * 100:
-                    best_match = similarity / 100.0
+                score = similarity(kw1, kw2)
+                if score >= threshold and score > best_match * 100:
+                    best_match = score / 100.0
                     best_kw2 = kw2
             
-            if best_kw2:
+            if best_kw2 is not None:
                 match_count += best_match
                 used_keywords2.add(best_kw2)
         
@@ -670,19 +1141,35 @@ class DataProcessor:
     def export_lost_customers_to_excel(
         self, 
         lost_df: pd.DataFrame, 
-        filename: str = None
+        filename: str = None,
+        buffer: io.BytesIO = None
     ) -> str:
-        """خروجی اکسل مشتریان از دست رفته"""
+        """
+        خروجی اکسل مشتریان از دست رفته
+        
+        اگر buffer داده شود، فایل بدون نوشتن روی دیسک مستقیماً در آن ساخته می‌شود
+        (xlsxwriter در حالت in_memory) و فقط نام فایل برگردانده می‌شود.
+        """
         if filename is None:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"lost_customers_{timestamp}.xlsx"
         
-        output_dir = Path("exports")
-        output_dir.mkdir(exist_ok=True)
-        
-        filepath = output_dir / filename
+        if buffer is not None:
+            target = buffer
+            writer_kwargs = {
+                'engine': 'xlsxwriter',
+                'engine_kwargs': {'options': {'in_memory': True}}
+            }
+        else:
+            output_dir = Path("exports")
+            output_dir.mkdir(exist_ok=True)
+            
+            target = output_dir / filename
+            # همان موتور مسیر بافر تا عرض ستون‌ها با یک set_column تنظیم شود؛ کل شیت تا بستن در حافظه
+            # می‌ماند (بدون constant_memory) که برای لیست کوتاه مشتریان از دست رفته مشکلی نیست
+            writer_kwargs = {'engine': 'xlsxwriter'}
         
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+        with pd.ExcelWriter(target, **writer_kwargs) as writer:
             lost_df.to_excel(writer, sheet_name='مشتریان از دست رفته', index=False)
             
             stats_data = {
@@ -707,24 +1194,21 @@ class DataProcessor:
             stats_df = pd.DataFrame(stats_data)
             stats_df.to_excel(writer, sheet_name='آمار', index=False)
             
-            workbook = writer.book
             worksheet = writer.sheets['مشتریان از دست رفته']
             
-            worksheet.column_dimensions['A'].width = 35
-            worksheet.column_dimensions['B'].width = 12
-            worksheet.column_dimensions['C'].width = 12
-            worksheet.column_dimensions['D'].width = 15
-            worksheet.column_dimensions['E'].width = 25
-            worksheet.column_dimensions['F'].width = 25
-            worksheet.column_dimensions['G'].width = 50
-            worksheet.column_dimensions['H'].width = 50
-            worksheet.column_dimensions['I'].width = 30
-            worksheet.column_dimensions['J'].width = 15
+            column_widths = [35, 12, 12, 15, 25, 25, 50, 50, 30, 15]
+            
+            for col_idx, width in enumerate(column_widths):
+                worksheet.set_column(col_idx, col_idx, width)
+        
+        if buffer is not None:
+            return filename
         
-        return str(filepath)
+        return str(target)
     
     # ==================== CRM ====================
     
+    @_synchronized
     def add_customer(
         self,
         customer_name: str,
@@ -751,7 +1235,20 @@ class DataProcessor:
             }
             
             self.df = pd.concat([self.df, pd.DataFrame([new_row])], ignore_index=True)
-            self.process_data()
+            self._source = None
+            
+            # فقط ردیف جدید پاکسازی و به انتهای processed_data اضافه می‌شود
+            index = self.df.index[-1]
+            row = self._clean_rows(self.df.loc[[index]])
+            
+            if row.empty or self.processed_data is None:
+                self.process_data()
+            else:
+                self._append_processed_row(row)
+                self._refresh_summaries()
+                self._update_customer_index(row.at[index, 'customer_name'])
+                self._reorder_customer_index()
+            
             self.save_to_excel()
             
             return True
@@ -760,6 +1257,7 @@ class DataProcessor:
             print(f"خطا: {e}")
             return False
     
+    @_synchronized
     def update_customer(
         self,
         index: int,
@@ -791,7 +1289,23 @@ class DataProcessor:
             if products:
                 self.df.at[index, 'نام محصول'] = products
             
-            self.process_data()
+            # self.df دیگر با فایل منبع یکی نیست؛ کش داده پردازش شده نباید استفاده شود
+            self._source = None
+            
+            # فقط همین ردیف دوباره پاکسازی و در processed_data جایگزین می‌شود
+            row = self._clean_rows(self.df.loc[[index]])
+            
+            if row.empty or index not in self.processed_data.index:
+                self.process_data()
+            else:
+                old_name = self.processed_data.at[index, 'customer_name']
+                self._replace_processed_row(index, row)
+                self._refresh_summaries()
+                
+                for name in {old_name, row.at[index, 'customer_name']}:
+                    self._update_customer_index(name)
+                self._reorder_customer_index()
+            
             self.save_to_excel()
             
             return True
@@ -800,11 +1314,55 @@ class DataProcessor:
             print(f"خطا: {e}")
             return False
     
+    def _replace_processed_row(self, index: int, row: pd.DataFrame):
+        """جایگزینی یک ردیف processed_data با ردیف پاکسازی شده"""
+        # روی کپی؛ فریم قبلی که در دست خواننده‌ها (یا کش رابط کاربری) است نیمه‌کاره تغییر نمی‌کند
+        data = self.processed_data.copy()
+        
+        for col in row.columns:
+            value = row.at[index, col]
+            
+            if isinstance(data[col].dtype, pd.CategoricalDtype) and value not in data[col].cat.categories:
+                data[col] = data[col].cat.add_categories([value])
+            
+            data.at[index, col] = value
+        
+        self.processed_data = data
+    
+    def _append_processed_row(self, row: pd.DataFrame):
+        """افزودن یک ردیف پاکسازی شده به انتهای processed_data (با حفظ ستون‌های دسته‌ای)"""
+        # کپی سطحی کافی است: فقط ستون‌ها جایگزین می‌شوند و فریم قبلی دست نمی‌خورد
+        data = self.processed_data.copy(deep=False)
+        row = row.copy()
+        
+        for col in row.columns:
+            if isinstance(data[col].dtype, pd.CategoricalDtype):
+                new_values = [v for v in row[col] if v not in data[col].cat.categories]
+                if new_values:
+                    data[col] = data[col].cat.add_categories(new_values)
+                row[col] = row[col].astype(data[col].dtype)
+        
+        self.processed_data = pd.concat([data, row])
+    
+    @_synchronized
     def delete_customer(self, index: int) -> bool:
         """حذف سفارش"""
         try:
             self.df = self.df.drop(index).reset_index(drop=True)
-            self.process_data()
+            self._source = None
+            
+            if index not in self.processed_data.index:
+                self.process_data()
+            else:
+                # برچسب ردیف‌های بعدی مانند reset_index روی df یکی کم می‌شود
+                name = self.processed_data.at[index, 'customer_name']
+                data = self.processed_data.drop(index)
+                data.index = data.index - (data.index > index)
+                self.processed_data = data
+                self._refresh_summaries()
+                self._update_customer_index(name)
+                self._reorder_customer_index()
+            
             self.save_to_excel()
             return True
         except Exception as e:
@@ -813,16 +1371,66 @@ class DataProcessor:
     
     # ==================== ذخیره ====================
     
+    @_synchronized
     def save_to_excel(self, output_file: str = None):
         """ذخیره فایل اکسل"""
         output_file = output_file or self.excel_file
         
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            for sheet_name in self.df['sheet_name'].unique():
-                sheet_df = self.df[self.df['sheet_name'] == sheet_name]
-                sheet_df = sheet_df.drop(columns=['sheet_name'])
-                sheet_df.to_excel(writer, sheet_name=str(sheet_name), index=False)
+        # کتاب کار write_only ردیف‌ها را مستقیم به XML می‌نویسد و شیء سلول در حافظه نگه نمی‌دارد
+        wb = Workbook(write_only=True)
+        columns = [col for col in self.df.columns if col != 'sheet_name']
+        
+        for sheet_name, sheet_df in self.df.groupby('sheet_name', sort=False):
+            ws = wb.create_sheet(str(sheet_name))
+            ws.append(columns)
+            
+            # سلول خالی به جای NaN (مانند to_excel)
+            values = sheet_df[columns].astype(object)
+            values = values.where(values.notna(), None)
+            
+            for row in values.itertuples(index=False, name=None):
+                ws.append(row)
+        
+        wb.save(output_file)
     
     def export_to_excel(self, filename: str, data: pd.DataFrame):
-        """خروجی اکسل"""
-        data.to_excel(filename, index=False, engine='openpyxl')
\ No newline at end of file
+        """خروجی اکسل در فایل (همان نوشتن ردیف به ردیف export_to_excel_bytes)"""
+        self._write_excel_rows(filename, data)
+    
+    def export_to_excel_bytes(self, data: pd.DataFrame) -> bytes:
+        """خروجی اکسل در حافظه (بدون نوشتن فایل روی دیسک)"""
+        buffer = io.BytesIO()
+        self._write_excel_rows(buffer, data)
+        return buffer.getvalue()
+    
+    @staticmethod
+    def _write_excel_rows(target, data: pd.DataFrame):
+        """
+        نوشتن DataFrame در یک شیت اکسل، ردیف به ردیف (target: مسیر فایل یا بافر)
+        
+        در حالت constant_memory هر ردیف پس از نوشتن ردیف بعدی به فایل موقت می‌رود و در حافظه نمی‌ماند؛
+        این حالت فقط نوشتن ردیف به ردیف را می‌پذیرد، پس به جای to_excel (که ستونی می‌نویسد) ردیف‌ها دستی
+        و تکه به تکه (بدون کپی object کل جدول) نوشته می‌شوند. سرتیتر و قالب تاریخ مانند to_excel است.
+        """
+        workbook = xlsxwriter.Workbook(target, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd hh:mm:ss'
+        })
+        worksheet = workbook.add_worksheet()
+        
+        # مقادیر لیستی (مانند products_list) مانند to_excel به صورت متن
+        for container in (list, tuple, set, frozenset, dict):
+            worksheet.add_write_handler(container, _write_as_text)
+        
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        worksheet.write_row(0, 0, [str(col) for col in data.columns], header_format)
+        
+        for start in range(0, len(data), _EXCEL_CHUNK_ROWS):
+            # سلول خالی به جای NaN (مانند to_excel)
+            values = data.iloc[start:start + _EXCEL_CHUNK_ROWS].astype(object)
+            values = values.where(values.notna(), None)
+            
+            for row_idx, row in enumerate(values.itertuples(index=False, name=None), start=start + 1):
+                worksheet.write_row(row_idx, 0, row)
+        
+        workbook.close()
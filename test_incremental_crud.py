@@ -0,0 +1,71 @@
+import shutil
+
+import pandas as pd
+
+from data_processor import DataProcessor, SearchMode
+
+EXCEL_FILE = "temp_excel_files_by_year_panta-new.xlsx"
+
+
+def _as_object(df: pd.DataFrame) -> pd.DataFrame:
+    """ستون‌های دسته‌ای به object (دسته‌های اضافه شده در ویرایش درجا با پردازش کامل فرق دارند)"""
+    df = df.reset_index(drop=True)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+def _assert_matches_fresh(dp: DataProcessor, step: str):
+    """نتیجه ویرایش درجا باید با process_data کامل روی همان self.df یکی باشد"""
+    ref = DataProcessor(dp.excel_file)
+    ref.data_dir = dp.data_dir
+    ref.process_data(dp.df.copy())
+
+    pd.testing.assert_frame_equal(
+        _as_object(dp.processed_data), _as_object(ref.processed_data), check_dtype=False, obj=step
+    )
+    assert dp.customer_index == ref.customer_index, step
+    assert list(dp.customer_index) == list(ref.customer_index), step
+    assert dp.sorted_customer_names == ref.sorted_customer_names, step
+    assert (
+        {name: list(positions) for name, positions in dp._customer_indices.items()}
+        == {name: list(positions) for name, positions in ref._customer_indices.items()}
+    ), step
+    return ref
+
+
+def test_incremental_crud_matches_full_processing(tmp_path):
+    """ویرایش، حذف و افزودن سفارش روی کپی فایل اکسل"""
+    excel_path = tmp_path / EXCEL_FILE
+    shutil.copy(EXCEL_FILE, excel_path)
+
+    dp = DataProcessor(str(excel_path))
+    dp.data_dir = tmp_path
+    dp.load_data()
+    dp.process_data()
+
+    name = dp.processed_data['customer_name'].iloc[10]
+
+    assert dp.update_customer(10, customer_name='مشتری کاملا جدید تست', state='رسمی')
+    _assert_matches_fresh(dp, 'update-new-name')
+
+    assert dp.update_customer(10, customer_name=name, products='محصول الف، محصول ب')
+    _assert_matches_fresh(dp, 'update-back')
+
+    assert dp.delete_customer(20)
+    _assert_matches_fresh(dp, 'delete')
+
+    assert dp.add_customer('مشتری اضافه', 1404, 3, 'غیررسمی', 'آدرس', '09120000000', '', 'x')
+    _assert_matches_fresh(dp, 'add')
+
+    assert dp.add_customer(name, 1403, 5, 'رسمی', '', '', '02100000000', 'y, z')
+    ref = _assert_matches_fresh(dp, 'add-existing')
+
+    # جستجو روی ایندکس به‌روز شده همان نتیجه ایندکس تازه را می‌دهد
+    for query in ('مشتری اضافه', name):
+        for mode in SearchMode:
+            assert (
+                [(r.customer_name, r.match_score) for r in dp.search_customer(query, mode=mode)]
+                == [(r.customer_name, r.match_score) for r in ref.search_customer(query, mode=mode)]
+            ), (query, mode)
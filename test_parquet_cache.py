@@ -0,0 +1,43 @@
+import os
+import shutil
+
+import pandas as pd
+
+from data_processor import DataProcessor
+
+EXCEL_FILE = "temp_excel_files_by_year_panta-new.xlsx"
+
+
+def _load(tmp_path):
+    dp = DataProcessor(str(tmp_path / EXCEL_FILE))
+    dp.data_dir = tmp_path
+    return dp.load_data()
+
+
+def test_warm_load_matches_cold_load(tmp_path):
+    """بارگذاری از کش Parquet باید دقیقاً همان self.df خوانده شده از اکسل را بدهد"""
+    shutil.copy(EXCEL_FILE, tmp_path / EXCEL_FILE)
+
+    cold = _load(tmp_path)
+    assert (tmp_path / "temp_excel_files_by_year_panta-new.parquet").exists()
+    warm = _load(tmp_path)
+
+    pd.testing.assert_frame_equal(cold, warm)
+
+    # نوع هر مقدار هم یکسان باشد (شماره ثابت عددی نباید پس از کش متن شود)
+    for col in cold.columns[cold.dtypes == object]:
+        assert cold[col].map(type).equals(warm[col].map(type)), col
+
+
+def test_cache_ignored_after_workbook_changes(tmp_path):
+    """کش فقط برای همان نسخه فایل اکسل معتبر است، حتی اگر زمان تغییر فایل قدیمی‌تر شود"""
+    excel_path = tmp_path / EXCEL_FILE
+    shutil.copy(EXCEL_FILE, excel_path)
+    _load(tmp_path)
+
+    stat = excel_path.stat()
+    os.utime(excel_path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**12))
+
+    dp = DataProcessor(str(excel_path))
+    dp.data_dir = tmp_path
+    assert dp._read_parquet_cache(str(excel_path), dp._file_stamp(str(excel_path))) is None
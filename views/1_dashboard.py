@@ -0,0 +1,72 @@
+"""
+صفحه داشبورد اصلی
+"""
+
+import streamlit as st
+from common import (
+    get_data_processor,
+    compute_kpis,
+    yearly_stats_cached,
+    product_stats_cached,
+    order_state_stats_cached,
+    build_yearly_orders_bar,
+    build_top_products_pie,
+    build_state_orders_bar
+)
+
+dp = get_data_processor()
+
+# ==================== 🏠 داشبورد ====================
+st.subheader("🏠 داشبورد اصلی")
+
+# KPI ها
+kpis = compute_kpis(dp, dp.data_version)
+total_customers = kpis['total_customers']
+total_orders = kpis['total_orders']
+total_products = kpis['total_products']
+
+# آمار رسمی/غیررسمی
+formal_count = kpis['formal_count']
+informal_count = kpis['informal_count']
+
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.metric("👥 تعداد مشتریان", f"{total_customers:,}")
+with col2:
+    st.metric("🛒 کل سفارشات", f"{total_orders:,}")
+    st.caption(f"🟢 رسمی: {formal_count:,} | 🟡 غیررسمی: {informal_count:,}")
+with col3:
+    st.metric("📦 کل محصولات", f"{int(total_products):,}")
+with col4:
+    st.metric("نرخ رسمی", f"{kpis['formal_percentage']:.1f}%")
+
+st.divider()
+
+# نمودارها
+col_chart1, col_chart2 = st.columns(2)
+
+with col_chart1:
+    yearly_stats = yearly_stats_cached(dp, dp.data_version)
+    fig1 = build_yearly_orders_bar(yearly_stats, dp.data_version)
+    st.plotly_chart(fig1, use_container_width=True)
+
+with col_chart2:
+    product_stats = product_stats_cached(dp, dp.data_version)
+    fig2 = build_top_products_pie(product_stats, dp.data_version)
+    st.plotly_chart(fig2, use_container_width=True)
+
+st.divider()
+
+st.markdown("### 📋 تحلیل وضعیت سفارشات")
+
+state_stats = order_state_stats_cached(dp, dp.data_version)
+
+col_state1, col_state2 = st.columns(2)
+
+with col_state1:
+    fig3 = build_state_orders_bar(state_stats, dp.data_version)
+    st.plotly_chart(fig3, use_container_width=True)
+
+with col_state2:
+    st.dataframe(state_stats, use_container_width=True, height=200)
@@ -0,0 +1,138 @@
+"""
+صفحه جستجوی هوشمند مشتری
+"""
+
+import streamlit as st
+from common import (
+    get_data_processor,
+    ORDER_COLUMN_CONFIG,
+    HISTORY_COLUMNS,
+    SEARCH_MODES,
+    MIN_QUERY_LENGTH,
+    search_customer_cached,
+    customer_history_csv_cached,
+    to_arrow
+)
+
+dp = get_data_processor()
+
+# ==================== 🔍 جستجوی مشتری ====================
+st.subheader("🔍 جستجوی هوشمند مشتری")
+
+st.info("💡 می‌توانید با هر بخشی از نام مشتری جستجو کنید. مثلاً: 'ایرانیان' یا 'کریمان' یا 'آبادگران'")
+
+# ورودی‌ها در فرم هستند تا جستجو فقط با دکمه جستجو (نه با هر کلید یا تغییر اسلایدر) اجرا شود
+with st.form("search_form"):
+    col_search1, col_search2 = st.columns([3, 1])
+    
+    with col_search1:
+        query = st.text_input("🔎 نام مشتری:", placeholder="مثال: ایرانیان")
+    
+    with col_search2:
+        search_mode = SEARCH_MODES[st.selectbox("حالت:", tuple(SEARCH_MODES))]
+    
+    min_score = st.slider("حداقل امتیاز:", 0, 100, 60, 5)
+    
+    st.form_submit_button("🔍 جستجو", type="primary")
+
+# فاصله‌های اضافه کلید کش جدیدی نمی‌سازند؛ پرس‌وجوهای خیلی کوتاه کل مشتریان را فازی اسکن نمی‌کنند
+query = query.strip()
+
+if 0 < len(query) < MIN_QUERY_LENGTH:
+    st.warning(f"⚠️ حداقل {MIN_QUERY_LENGTH} حرف وارد کنید")
+
+elif query:
+    with st.spinner("در حال جستجو..."):
+        results = search_customer_cached(dp, dp.data_version, query, search_mode, min_score)
+    
+    if results:
+        st.success(f"✅ {len(results)} مشتری یافت شد")
+        
+        for i, result in enumerate(results, 1):
+            with st.expander(f"🏢 {i}. {result.customer_name} - امتیاز: {result.match_score}%", expanded=i==1):
+                
+                col_info1, col_info2, col_info3, col_info4 = st.columns(4)
+                
+                with col_info1:
+                    st.metric("کل سفارشات", result.total_purchases)
+                with col_info2:
+                    st.metric("🟢 سفارش رسمی", result.formal_purchases)
+                with col_info3:
+                    st.metric("🟡 سفارش غیررسمی", result.informal_purchases)
+                with col_info4:
+                    st.metric("تعداد محصول", result.total_products)
+                
+                col_time1, col_time2 = st.columns(2)
+                
+                with col_time1:
+                    st.info(f"📅 **سال‌های فعالیت:** {result.years_str}")
+                
+                with col_time2:
+                    st.info(f"📆 **ماه‌های فعالیت:** {result.months_str}")
+                
+                st.divider()
+                
+                tab1, tab2, tab3, tab4 = st.tabs(["📞 تماس", "🗺️ آدرس", "📦 محصولات", "📋 تاریخچه"])
+                
+                with tab1:
+                    st.markdown("#### شماره‌های تماس")
+                    
+                    col_phone1, col_phone2 = st.columns(2)
+                    
+                    with col_phone1:
+                        if result.mobile_numbers:
+                            st.markdown("**📱 موبایل:**")
+                            st.code("\n".join(result.mobile_numbers))
+                        else:
+                            st.warning("شماره موبایل ثبت نشده")
+                    
+                    with col_phone2:
+                        if result.phone_numbers:
+                            st.markdown("**☎️ ثابت:**")
+                            st.code("\n".join(result.phone_numbers))
+                        else:
+                            st.warning("شماره ثابت ثبت نشده")
+                
+                with tab2:
+                    st.markdown("#### 🗺️ آدرس‌ها")
+                    if result.addresses:
+                        st.info("\n\n".join(
+                            f"**آدرس {idx}:** {addr}"
+                            for idx, addr in enumerate(result.addresses, 1)
+                        ))
+                    else:
+                        st.warning("آدرسی ثبت نشده")
+                
+                with tab3:
+                    st.markdown("#### 📦 محصولات خریداری شده")
+                    if result.products:
+                        # یک المان markdown برای هر ستون به‌جای یک المان برای هر محصول
+                        cols = st.columns(3)
+                        for idx, col in enumerate(cols):
+                            column_products = result.products[idx::3]
+                            if column_products:
+                                col.markdown("\n".join(f"- {product}" for product in column_products))
+                    else:
+                        st.warning("محصولی ثبت نشده")
+                
+                with tab4:
+                    st.markdown("#### 📋 تاریخچه کامل خریدها")
+                    history_df = dp.get_customer_details(result.customer_name, HISTORY_COLUMNS)
+                    
+                    st.dataframe(
+                        to_arrow(history_df, HISTORY_COLUMNS),
+                        use_container_width=True,
+                        column_config=ORDER_COLUMN_CONFIG,
+                        height=300
+                    )
+                    
+                    csv = customer_history_csv_cached(dp, dp.data_version, result.customer_name)
+                    st.download_button(
+                        f"📥 دانلود تاریخچه {result.customer_name}",
+                        csv,
+                        f"customer_{result.customer_name}.csv",
+                        "text/csv"
+                    )
+    
+    else:
+        st.warning("❌ نتیجه‌ای یافت نشد. امتیاز را کاهش دهید یا حالت جستجو را تغییر دهید.")
@@ -0,0 +1,45 @@
+"""
+صفحه تحلیل محصولات
+"""
+
+import streamlit as st
+from common import (
+    get_data_processor,
+    product_stats_cached,
+    build_top_products_bar,
+    product_stats_csv_cached
+)
+
+dp = get_data_processor()
+
+# ==================== 📊 تحلیل محصولات ====================
+st.subheader("📊 تحلیل محصولات")
+
+product_stats = product_stats_cached(dp, dp.data_version)
+
+col1, col2 = st.columns([2, 1])
+
+with col1:
+    st.metric("تعداد محصولات منحصر به فرد", len(product_stats))
+with col2:
+    st.metric("مجموع فروش", int(product_stats['تعداد_فروش'].sum()))
+
+st.divider()
+
+top_n = st.slider("تعداد محصولات برتر:", 5, 50, 20)
+
+fig = build_top_products_bar(product_stats, dp.data_version, top_n)
+st.plotly_chart(fig, use_container_width=True)
+
+st.divider()
+
+st.markdown("### 📋 لیست کامل محصولات")
+st.dataframe(product_stats, use_container_width=True, height=400)
+
+csv = product_stats_csv_cached(dp, dp.data_version)
+st.download_button(
+    "📥 دانلود گزارش محصولات",
+    csv,
+    "product_report.csv",
+    "text/csv"
+)
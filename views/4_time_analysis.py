@@ -0,0 +1,64 @@
+"""
+صفحه تحلیل زمانی (سالانه و ماهانه)
+"""
+
+import streamlit as st
+from common import (
+    get_data_processor,
+    monthly_stats_cached,
+    yearly_stats_cached,
+    yearly_monthly_grouped_cached,
+    build_customer_trend_line,
+    build_yearly_state_grouped_bar,
+    build_monthly_trend
+)
+
+dp = get_data_processor()
+
+# ==================== 📈 تحلیل زمانی ====================
+st.subheader("📈 تحلیل زمانی مشتریان")
+
+st.markdown("### 📊 تحلیل سالانه")
+yearly_stats = yearly_stats_cached(dp, dp.data_version)
+
+col1, col2 = st.columns(2)
+
+with col1:
+    fig1 = build_customer_trend_line(yearly_stats, dp.data_version)
+    st.plotly_chart(fig1, use_container_width=True)
+
+with col2:
+    fig2 = build_yearly_state_grouped_bar(yearly_stats, dp.data_version)
+    st.plotly_chart(fig2, use_container_width=True)
+
+st.dataframe(yearly_stats, use_container_width=True)
+
+st.divider()
+
+st.markdown("### 📅 تحلیل ماهانه (دسته‌بندی شده بر اساس سال)")
+
+selected_year = st.selectbox(
+    "📅 انتخاب سال:",
+    dp.sorted_years
+)
+
+if selected_year:
+    monthly_stats = monthly_stats_cached(dp, dp.data_version, int(selected_year))
+    
+    if not monthly_stats.empty:
+        fig3 = build_monthly_trend(monthly_stats, dp.data_version, int(selected_year))
+        st.plotly_chart(fig3, use_container_width=True)
+        
+        st.dataframe(monthly_stats, use_container_width=True)
+    else:
+        st.warning(f"❌ داده‌ای برای سال {int(selected_year)} یافت نشد")
+
+st.divider()
+
+# محتوای expander حتی در حالت بسته اجرا و ارسال می‌شود؛ جدول‌ها فقط با روشن کردن گزینه ساخته می‌شوند
+if st.toggle("🗓️ مشاهده تمام سال‌ها و ماه‌های آنها"):
+    yearly_monthly_data = yearly_monthly_grouped_cached(dp, dp.data_version)
+    
+    for year, monthly_df in yearly_monthly_data.items():
+        st.markdown(f"#### 📅 سال {year}")
+        st.dataframe(monthly_df, use_container_width=True, height=200)
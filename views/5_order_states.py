@@ -0,0 +1,57 @@
+"""
+صفحه تحلیل وضعیت سفارشات (رسمی/غیررسمی)
+"""
+
+import streamlit as st
+from common import (
+    get_data_processor,
+    compute_kpis,
+    order_state_stats_cached,
+    yearly_stats_cached,
+    build_state_pie,
+    build_state_compare_bar,
+    build_formalization_trend
+)
+
+dp = get_data_processor()
+
+# ==================== 📋 تحلیل وضعیت سفارشات ====================
+st.subheader("📋 تحلیل وضعیت سفارشات (رسمی/غیررسمی)")
+
+state_stats = order_state_stats_cached(dp, dp.data_version)
+
+# شمارنده‌ها یک بار در هر نسخه داده محاسبه شده‌اند
+kpis = compute_kpis(dp, dp.data_version)
+
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    st.metric("🟢 سفارشات رسمی", f"{kpis['formal_count']:,}")
+
+with col2:
+    st.metric("🟡 سفارشات غیررسمی", f"{kpis['informal_count']:,}")
+
+with col3:
+    st.metric("نرخ رسمی‌سازی", f"{kpis['formalization_percentage']:.1f}%")
+
+st.divider()
+
+col_chart1, col_chart2 = st.columns(2)
+
+with col_chart1:
+    fig1 = build_state_pie(state_stats, dp.data_version)
+    st.plotly_chart(fig1, use_container_width=True)
+
+with col_chart2:
+    fig2 = build_state_compare_bar(state_stats, dp.data_version)
+    st.plotly_chart(fig2, use_container_width=True)
+
+st.dataframe(state_stats, use_container_width=True)
+
+st.divider()
+
+st.markdown("### 📊 روند رسمی‌سازی در طول زمان")
+
+yearly_stats = yearly_stats_cached(dp, dp.data_version)
+fig3 = build_formalization_trend(yearly_stats, dp.data_version)
+st.plotly_chart(fig3, use_container_width=True)
@@ -0,0 +1,213 @@
+"""
+صفحه شناسایی مشتریان از دست رفته
+"""
+
+import streamlit as st
+import io
+from common import (
+    get_data_processor,
+    EXCEL_MIME,
+    PRIORITY_LEVELS,
+    find_lost_customers_cached
+)
+
+dp = get_data_processor()
+
+# ==================== 🔴 مشتریان از دست رفته ====================
+st.subheader("🔴 شناسایی مشتریان از دست رفته")
+
+st.markdown("""
+این بخش مشتریانی را شناسایی می‌کند که در گذشته از شما خرید داشتند 
+اما اخیراً خریدی انجام نداده‌اند.
+
+**🎯 منطق کار:**
+- مشتریانی که در بازه **سال‌های فعالیت** حداقل یک بار خرید کرده‌اند
+- اما در بازه **سال‌های سکوت** هیچ خریدی نداشته‌اند
+- تطبیق هوشمند نام‌ها (حداقل 2 از 3 کلمه مشترک یا شبیه)
+- محصولات نرمال‌سازی شده (Panflow 110 = panflow110)
+""")
+
+# تنظیمات
+with st.expander("⚙️ تنظیمات جستجو", expanded=True):
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("#### 📅 دوره فعالیت")
+        active_start = st.number_input(
+            "شروع دوره فعالیت",
+            min_value=1390,
+            max_value=1404,
+            value=1393,
+            help="مشتریانی که از این سال به بعد خرید داشته‌اند"
+        )
+        
+        active_end = st.number_input(
+            "پایان دوره فعالیت",
+            min_value=1390,
+            max_value=1404,
+            value=1402,
+            help="تا این سال خرید داشته‌اند"
+        )
+        
+        min_purchases = st.number_input(
+            "حداقل تعداد خرید",
+            min_value=1,
+            max_value=50,
+            value=1,
+            help="فقط مشتریانی که حداقل این تعداد خرید داشته‌اند"
+        )
+    
+    with col2:
+        st.markdown("#### 🔇 دوره سکوت")
+        silent_start = st.number_input(
+            "شروع دوره سکوت",
+            min_value=1390,
+            max_value=1404,
+            value=1403,
+            help="از این سال به بعد خرید نداشته‌اند"
+        )
+        
+        silent_end = st.number_input(
+            "پایان دوره سکوت",
+            min_value=1390,
+            max_value=1404,
+            value=1404,
+            help="تا این سال هیچ خریدی نداشته‌اند"
+        )
+        
+        similarity = st.slider(
+            "درصد شباهت کلمات",
+            min_value=70,
+            max_value=100,
+            value=85,
+            help="برای تشخیص نام‌های شبیه (مثلاً آبادگران ≈ ابادگران)"
+        )
+
+# دکمه جستجو (پارامترها نگه داشته می‌شوند تا فیلترهای بعدی نتیجه را از کش بخوانند)
+if st.button("🔍 شناسایی مشتریان از دست رفته", type="primary", use_container_width=True):
+    st.session_state.lost_params = (
+        int(active_start),
+        int(active_end),
+        int(silent_start),
+        int(silent_end),
+        float(similarity),
+        int(min_purchases)
+    )
+
+if st.session_state.get('lost_params'):
+    with st.spinner("در حال پردازش... این ممکن است چند ثانیه طول بکشد..."):
+        try:
+            lost_df = find_lost_customers_cached(dp, dp.data_version, *st.session_state.lost_params)
+            
+            if len(lost_df) == 0:
+                st.success("🎉 هیچ مشتری از دست رفته‌ای یافت نشد!")
+                st.balloons()
+            else:
+                # نمایش آمار
+                st.success(f"✅ {len(lost_df)} مشتری از دست رفته شناسایی شد!")
+                
+                # شمارش هر سه سطح در یک مرحله (سطوح بدون مشتری: صفر)
+                high_priority, medium_priority, low_priority = (
+                    lost_df['اولویت'].value_counts().reindex(PRIORITY_LEVELS, fill_value=0).tolist()
+                )
+                
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.metric("🔴 اولویت بالا", high_priority)
+                
+                with col2:
+                    st.metric("🟡 اولویت متوسط", medium_priority)
+                
+                with col3:
+                    st.metric("🟢 اولویت پایین", low_priority)
+                
+                with col4:
+                    total_purchases = lost_df['تعداد_خرید'].sum()
+                    st.metric("📊 مجموع خریدها", f"{total_purchases:,}")
+                
+                st.divider()
+                
+                # فیلتر اولویت
+                st.subheader("📊 نتایج")
+                
+                priority_filter = st.multiselect(
+                    "فیلتر بر اساس اولویت:",
+                    options=PRIORITY_LEVELS,
+                    default=PRIORITY_LEVELS
+                )
+                
+                filtered_df = lost_df[lost_df['اولویت'].isin(priority_filter)]
+                
+                # نمایش جدول
+                st.dataframe(
+                    filtered_df,
+                    use_container_width=True,
+                    height=400,
+                    column_config={
+                        "نام_مشتری": st.column_config.TextColumn("نام مشتری", width="medium"),
+                        "آخرین_سال": st.column_config.NumberColumn("آخرین سال", format="%d"),
+                        "آخرین_ماه": st.column_config.NumberColumn("آخرین ماه", format="%d"),
+                        "تعداد_خرید": st.column_config.NumberColumn("تعداد خرید", format="%d"),
+                        "اولویت": st.column_config.TextColumn("اولویت", width="small"),
+                    }
+                )
+                
+                st.divider()
+                
+                # دکمه دانلود
+                st.subheader("💾 خروجی اکسل")
+                
+                col_dl1, col_dl2 = st.columns([2, 1])
+                
+                with col_dl1:
+                    st.info(f"📋 آماده دانلود: {len(filtered_df)} مشتری در فایل اکسل با 2 شیت (داده‌ها + آمار)")
+                
+                with col_dl2:
+                    if st.button("📥 تولید و دانلود فایل اکسل", type="primary", use_container_width=True):
+                        with st.spinner("در حال تولید فایل..."):
+                            buf = io.BytesIO()
+                            filename = dp.export_lost_customers_to_excel(lost_df, buffer=buf)
+                            
+                            st.download_button(
+                                label="⬇️ دانلود فایل اکسل",
+                                data=buf.getvalue(),
+                                file_name=filename,
+                                mime=EXCEL_MIME,
+                                use_container_width=True
+                            )
+                            
+                            st.success("✅ فایل آماده دانلود است")
+                
+                # نمایش جزئیات برخی مشتریان
+                st.divider()
+                st.subheader("🔍 جزئیات مشتریان با اولویت بالا")
+                
+                high_priority_customers = filtered_df[filtered_df['اولویت'] == '🔴 بالا'].head(5)
+                
+                if len(high_priority_customers) > 0:
+                    # ردیف‌ها یک بار به dict تبدیل می‌شوند (دسترسی سریع‌تر از Series در هر فیلد)
+                    for row in high_priority_customers.to_dict('records'):
+                        with st.expander(f"🏢 {row['نام_مشتری']} - {row['تعداد_خرید']} خرید"):
+                            col_detail1, col_detail2 = st.columns(2)
+                            
+                            # یک المان markdown برای هر ستون به‌جای یک المان برای هر سطر
+                            with col_detail1:
+                                st.markdown(
+                                    f"**📅 آخرین خرید:** {int(row['آخرین_سال'])}/{int(row['آخرین_ماه'])}\n\n"
+                                    f"**📊 {row['آمار_سفارشات']}**\n\n"
+                                    f"**📱 موبایل:** {row['موبایل']}"
+                                )
+                            
+                            with col_detail2:
+                                st.markdown(
+                                    f"**☎️ تلفن:** {row['تلفن']}\n\n"
+                                    f"**🗺️ آدرس:** {row['آدرس']}\n\n"
+                                    f"**📦 محصولات:** {row['محصولات']}"
+                                )
+                else:
+                    st.info("مشتری با اولویت بالا یافت نشد")
+            
+        except Exception as e:
+            st.error(f"❌ خطا در پردازش: {e}")
+            st.exception(e)
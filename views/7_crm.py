@@ -0,0 +1,223 @@
+"""
+صفحه مدیریت مشتریان (CRM)
+"""
+
+import streamlit as st
+import pandas as pd
+from common import (
+    get_data_processor,
+    ORDER_COLUMN_CONFIG,
+    STATE_CHOICES,
+    CUSTOMER_RECORD_COLUMNS,
+    ORDER_LIST_COLUMNS,
+    MAX_RENDER_ROWS,
+    EXPORT_FORMATS,
+    to_arrow,
+    filter_orders_cached,
+    export_orders_cached
+)
+
+dp = get_data_processor()
+
+# ==================== 👥 مدیریت CRM ====================
+st.subheader("👥 مدیریت مشتریان (CRM)")
+
+tab1, tab2, tab3 = st.tabs(["➕ افزودن مشتری", "✏️ ویرایش", "📋 لیست کامل"])
+
+with tab1:
+    st.markdown("### ➕ افزودن مشتری/سفارش جدید")
+    
+    with st.form("add_customer_form"):
+        col_form1, col_form2 = st.columns(2)
+        
+        with col_form1:
+            new_name = st.text_input("نام مشتری *", help="نام کامل شرکت یا شخص")
+            new_year = st.number_input("سال *", min_value=1390, max_value=1410, value=1404)
+            new_month = st.number_input("ماه *", min_value=1, max_value=12, value=1)
+            new_state = st.selectbox(
+                "وضعیت سفارش *",
+                STATE_CHOICES,
+                help="آیا این سفارش رسمی است یا غیررسمی؟"
+            )
+        
+        with col_form2:
+            new_address = st.text_area("آدرس", help="آدرس کامل")
+            new_mobile = st.text_input("شماره موبایل", placeholder="09123456789")
+            new_phone = st.text_input("شماره ثابت", placeholder="02112345678")
+            new_products = st.text_input(
+                "محصولات (با , جدا کنید)",
+                placeholder="محصول A، محصول B، محصول C",
+                help="نام محصولات را با کاما از هم جدا کنید"
+            )
+        
+        submitted = st.form_submit_button("💾 ذخیره سفارش", type="primary", use_container_width=True)
+        
+        if submitted:
+            if new_name and new_year and new_month and new_state:
+                success = dp.add_customer(
+                    customer_name=new_name,
+                    year=new_year,
+                    month=new_month,
+                    state=new_state,
+                    address=new_address,
+                    mobile=new_mobile,
+                    phone=new_phone,
+                    products=new_products
+                )
+                
+                if success:
+                    st.success("✅ سفارش با موفقیت ثبت شد!")
+                    st.balloons()
+                    st.rerun()
+                else:
+                    st.error("❌ خطا در ثبت سفارش")
+            else:
+                st.warning("⚠️ لطفاً فیلدهای ضروری (*) را پر کنید")
+
+with tab2:
+    st.markdown("### ✏️ ویرایش سفارش مشتری")
+    
+    selected_customer = st.selectbox("🔍 انتخاب مشتری:", dp.sorted_customer_names)
+    
+    if selected_customer:
+        customer_records = dp.get_customer_details(selected_customer)
+        
+        st.markdown(f"#### 📋 سفارشات {selected_customer}")
+        st.dataframe(
+            to_arrow(customer_records, CUSTOMER_RECORD_COLUMNS),
+            use_container_width=True,
+            column_config=ORDER_COLUMN_CONFIG
+        )
+        
+        # برچسب گزینه‌ها یک بار و به صورت برداری ساخته می‌شوند (ماه نامشخص: «-»)
+        months = customer_records['month']
+        record_labels = (
+            "ردیف " + customer_records.index.astype(str)
+            + " - سال " + customer_records['year'].astype('Int64').astype(str)
+            + " ماه " + months.astype('Int64').astype(str).where(months.notna(), '-')
+        ).to_dict()
+        
+        record_index = st.selectbox(
+            "انتخاب رکورد برای ویرایش:",
+            customer_records.index.tolist(),
+            format_func=record_labels.get
+        )
+        
+        if record_index is not None:
+            record = customer_records.loc[record_index]
+            
+            st.divider()
+            
+            with st.form("edit_form"):
+                st.markdown("#### ✏️ ویرایش اطلاعات")
+                
+                edit_name = st.text_input("نام", value=record['customer_name'])
+                
+                col_e1, col_e2, col_e3 = st.columns(3)
+                with col_e1:
+                    edit_year = st.number_input("سال", value=int(record['year']))
+                with col_e2:
+                    edit_month = st.number_input(
+                        "ماه",
+                        value=int(record['month']) if pd.notna(record['month']) else None
+                    )
+                with col_e3:
+                    edit_state = st.selectbox(
+                        "وضعیت",
+                        STATE_CHOICES,
+                        index=0 if record['state_normalized'] == 'رسمی' else 1
+                    )
+                
+                edit_mobile = st.text_input("موبایل", value=record['mobile'])
+                edit_phone = st.text_input("ثابت", value=record['phone'])
+                edit_address = st.text_area("آدرس", value=record['address'])
+                edit_products = st.text_input("محصولات", value=record['products_str'])
+                
+                col_btn1, col_btn2 = st.columns(2)
+                
+                with col_btn1:
+                    if st.form_submit_button("💾 ذخیره تغییرات", type="primary", use_container_width=True):
+                        dp.update_customer(
+                            index=record_index,
+                            customer_name=edit_name,
+                            year=edit_year,
+                            month=edit_month,
+                            state=edit_state,
+                            mobile=edit_mobile,
+                            phone=edit_phone,
+                            address=edit_address,
+                            products=edit_products
+                        )
+                        st.success("✅ تغییرات ذخیره شد")
+                        st.rerun()
+                
+                with col_btn2:
+                    if st.form_submit_button("🗑️ حذف رکورد", type="secondary", use_container_width=True):
+                        if st.session_state.get('confirm_delete', False):
+                            dp.delete_customer(record_index)
+                            st.success("✅ رکورد حذف شد")
+                            st.session_state.confirm_delete = False
+                            st.rerun()
+                        else:
+                            st.session_state.confirm_delete = True
+                            st.warning("⚠️ برای تایید حذف، دوباره کلیک کنید")
+
+@st.fragment
+def render_order_list():
+    """لیست کامل سفارشات؛ تغییر فیلترها فقط همین بخش را دوباره اجرا می‌کند"""
+    st.markdown("### 📋 لیست کامل سفارشات")
+    
+    # فیلترها در فرم هستند تا به جای هر کلید، فقط با دکمه اعمال یک بار اجرا شوند
+    with st.form("order_filter_form"):
+        col_filter1, col_filter2, col_filter3 = st.columns(3)
+        
+        with col_filter1:
+            filter_year = st.multiselect(
+                "فیلتر سال:",
+                dp.sorted_years_asc
+            )
+        
+        with col_filter2:
+            filter_state = st.multiselect(
+                "فیلتر وضعیت:",
+                STATE_CHOICES
+            )
+        
+        with col_filter3:
+            filter_customer = st.text_input("فیلتر نام مشتری:")
+        
+        st.form_submit_button("🔍 اعمال فیلتر")
+    
+    filters = (tuple(filter_year), tuple(filter_state), filter_customer.strip())
+    filtered_df = filter_orders_cached(dp, dp.data_version, *filters)
+    
+    st.caption(f"نمایش {len(filtered_df):,} رکورد از {dp.total_orders:,}")
+    
+    shown_df = filtered_df
+    
+    if len(filtered_df) > MAX_RENDER_ROWS:
+        if not st.toggle(f"نمایش همه {len(filtered_df):,} ردیف در جدول"):
+            shown_df = filtered_df.iloc[:MAX_RENDER_ROWS]
+            st.info(f"نمایش {MAX_RENDER_ROWS:,} ردیف اول؛ برای مشاهده کامل از دانلود استفاده کنید")
+    
+    st.dataframe(
+        to_arrow(shown_df, ORDER_LIST_COLUMNS),
+        use_container_width=True,
+        column_config=ORDER_COLUMN_CONFIG,
+        height=500
+    )
+    
+    export_format = st.radio("فرمت:", list(EXPORT_FORMATS), horizontal=True)
+    extension, mime = EXPORT_FORMATS[export_format]
+    
+    st.download_button(
+        f"📥 دانلود لیست ({export_format})",
+        export_orders_cached(dp, dp.data_version, *filters, export_format),
+        f"all_orders.{extension}",
+        mime,
+        use_container_width=True
+    )
+
+
+with tab3:
+    render_order_list()
@@ -0,0 +1,109 @@
+"""
+صفحه گزارش‌گیری و خروجی
+"""
+
+import streamlit as st
+import datetime
+from common import (
+    get_data_processor,
+    EXCEL_MIME,
+    REPORT_TYPES,
+    monthly_stats_cached,
+    yearly_stats_cached,
+    product_stats_cached,
+    order_state_stats_cached,
+    EXPORT_FORMATS,
+    to_export_bytes
+)
+
+dp = get_data_processor()
+
+# ==================== 📥 گزارش‌گیری ====================
+st.subheader("📥 گزارش‌گیری و خروجی")
+
+# برچسب زمانی نام فایل‌ها یک بار در هر اجرا ساخته می‌شود
+file_stamp = datetime.datetime.now().strftime('%Y%m%d_%H%M')
+
+st.markdown("### 📊 گزارش‌های آماده")
+
+col_report1, col_report2, col_report3 = st.columns(3)
+
+with col_report1:
+    if st.button("📊 گزارش سالانه", use_container_width=True):
+        yearly = yearly_stats_cached(dp, dp.data_version)
+        filename = f"yearly_report_{file_stamp}.xlsx"
+        st.download_button(
+            "⬇️ دانلود گزارش سالانه",
+            dp.export_to_excel_bytes(yearly),
+            filename,
+            EXCEL_MIME,
+            use_container_width=True
+        )
+
+with col_report2:
+    if st.button("📦 گزارش محصولات", use_container_width=True):
+        products = product_stats_cached(dp, dp.data_version)
+        filename = f"products_report_{file_stamp}.xlsx"
+        st.download_button(
+            "⬇️ دانلود گزارش محصولات",
+            dp.export_to_excel_bytes(products),
+            filename,
+            EXCEL_MIME,
+            use_container_width=True
+        )
+
+with col_report3:
+    if st.button("📋 گزارش وضعیت", use_container_width=True):
+        states = order_state_stats_cached(dp, dp.data_version)
+        filename = f"state_report_{file_stamp}.xlsx"
+        st.download_button(
+            "⬇️ دانلود گزارش وضعیت",
+            dp.export_to_excel_bytes(states),
+            filename,
+            EXCEL_MIME,
+            use_container_width=True
+        )
+
+st.divider()
+
+st.markdown("### 🎯 گزارش سفارشی")
+
+report_type = st.selectbox(
+    "نوع گزارش:",
+    REPORT_TYPES
+)
+
+if report_type == "ماهانه":
+    selected_year_report = st.selectbox(
+        "انتخاب سال:",
+        dp.sorted_years
+    )
+else:
+    selected_year_report = None
+
+export_format = st.radio("فرمت:", list(EXPORT_FORMATS), horizontal=True)
+
+if st.button("📥 تولید گزارش", type="primary"):
+    if report_type == "سالانه":
+        data = yearly_stats_cached(dp, dp.data_version)
+    elif report_type == "ماهانه":
+        data = monthly_stats_cached(dp, dp.data_version, int(selected_year_report))
+    elif report_type == "محصولات":
+        data = product_stats_cached(dp, dp.data_version)
+    elif report_type == "وضعیت سفارشات":
+        data = order_state_stats_cached(dp, dp.data_version)
+    else:
+        data = dp.processed_data
+    
+    st.success("✅ گزارش آماده شد")
+    st.dataframe(data, use_container_width=True, height=400)
+    
+    extension, mime = EXPORT_FORMATS[export_format]
+    
+    st.download_button(
+        f"⬇️ دانلود {export_format}",
+        to_export_bytes(dp, data, export_format),
+        f"report_{report_type}_{file_stamp}.{extension}",
+        mime,
+        use_container_width=True
+    )